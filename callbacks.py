@@ -8,107 +8,151 @@ VTK używa wzorca Observer - rejestrujemy callback mówiąc "gdy się stanie X,
 Przykład: widget.AddObserver('InteractionEvent', moj_callback)
 
 Ten moduł zawiera trzy główne typy callbacków:
-1. SliderCallback - reaguje na przesunięcie suwaka (zmienia przezroczystość)
+1. make_opacity_callback() - reaguje na przesunięcie suwaka (zmienia przezroczystość)
 2. SlicePlaneCallback - reaguje na zmianę pozycji slice'a (przesuwa płaszczyznę)
 3. SliderToggleCallback - reaguje na klawisze (przełącza tryby wyświetlania)
 
 WZORZEC CALLABLE:
-Wszystkie callbacki są klasami z metodą __call__(), co pozwala używać ich jak funkcji.
+Pozostałe callbacki są klasami z metodą __call__(), co pozwala używać ich jak funkcji.
 Dzięki temu możemy przechowywać stan (self.xxx) między wywołaniami.
+
+Wyjątek: suwaki opacity podpinamy przez make_opacity_callback() - zwykłe
+domknięcie (closure) jest tańsze w wywołaniu niż instancja klasy z __call__,
+a przy przeciąganiu suwaka callback wywoływany jest dziesiątki razy.
 """
 
+from concurrent.futures import ThreadPoolExecutor
+
 from vtkmodules.vtkCommonCore import vtkCommand
-from vtkmodules.vtkImagingCore import vtkImageReslice, vtkImageMapToColors
+from vtkmodules.vtkCommonDataModel import vtkImageData
 
 from config import top_y, step_y, right_x0_col1, right_x1_col1, right_x0_col2, right_x1_col2
 from slider_widgets import SliderProperties, make_slider_widget_with_color
-from segmentation_utils import create_segmentation_3d_model
+from segmentation_utils import compute_segmentation_polydata, create_segmentation_actors
+from slice_utils import SLICE_AXES
+
 
+# Pozycje suwaków modeli segmentacji (układ w dwie kolumny), liczone raz przy imporcie.
+# Etykiet jest co najwyżej 255 (LUT ma 256 wpisów, 0 to tło), więc tyle wystarczy.
+# Element i to (x0, x1, y): początek i koniec suwaka w poziomie oraz jego wysokość.
+# Parzyste i -> kolumna 1 (najbardziej na prawo), nieparzyste -> kolumna 2
+# Y = 0.80, 0.755, 0.71, ... (co dwa suwaki schodzimy rząd niżej)
+_SEGMENTATION_SLIDER_POSITIONS = tuple(
+    ((right_x0_col1, right_x1_col1) if i % 2 == 0 else (right_x0_col2, right_x1_col2))
+    + (top_y - (i // 2) * step_y,)
+    for i in range(255)
+)
 
-class SliderCallback:
+
+def make_opacity_callback(actor_property, representation):
     """
-    Callback dla suwaków kontrolujących przezroczystość obiektów.
+    Tworzy callback suwaka opacity jako domknięcie (closure).
     
-    Ten prosty callback zmienia przezroczystość materiału aktora 3D
-    zgodnie z pozycją suwaka. Jest używany dla wszystkich suwaków tkanek
-    i modeli segmentacji.
+    Zmienia przezroczystość materiału aktora zgodnie z pozycją suwaka (tkanki
+    i modele segmentacji). Domknięcie zamiast klasy z __call__ oszczędza narzut
+    wywołania metody i wyszukiwania atrybutów self.xxx - metody VTK są powiązane
+    z góry jako zmienne lokalne domknięcia.
     
-    DZIAŁANIE:
-    1. Użytkownik przesuwa suwak
-    2. VTK wywołuje __call__ przekazując widget jako 'caller'
-    3. Odczytujemy wartość z suwaka (0.0 - 1.0)
-    4. Ustawiamy opacity materiału aktora
-    5. Aktor jest automatycznie przerysowywany
+    Zostają dwa przejścia Python<->C++ na zdarzenie (GetValue + SetOpacity).
+    Całkowite ominięcie Pythona wymagałoby własnej podklasy vtkCommand w C++
+    (Cython / moduł rozszerzeń), a projekt to zwykłe skrypty bez kroku kompilacji -
+    przy kilkudziesięciu suwakach nie jest to wąskie gardło.
     
-    Atrybuty:
-        actor_property (vtkProperty): Właściwości materiału aktora do modyfikacji
+    Argumenty:
+        actor_property (vtkProperty): Właściwości materiału aktora (actor.GetProperty())
+        representation (vtkSliderRepresentation2D): Reprezentacja suwaka
+            (widget.GetRepresentation())
+    
+    Returns:
+        function: Callback o sygnaturze (caller, ev) gotowy dla AddObserver
+    
+    Przykład:
+        >>> widget.AddObserver(vtkCommand.InteractionEvent,
+        ...                    make_opacity_callback(actor.GetProperty(),
+        ...                                          widget.GetRepresentation()))
     """
+    # Reprezentację i metody materiału wiążemy raz, przy rejestracji suwaka -
+    # zdarzenie nie wywołuje już caller.GetRepresentation() ani wyszukiwania atrybutów
+    get_value = representation.GetValue
+    get_opacity = actor_property.GetOpacity
+    set_opacity = actor_property.SetOpacity
     
-    def __init__(self, actor_property):
-        """
-        Inicjalizuje callback z referencją do właściwości aktora.
-        
-        Argumenty:
-            actor_property (vtkProperty): Obiekt reprezentujący materiał aktora 3D.
-                Zwykle pobierany przez actor.GetProperty()
-        
-        Zapamiętujemy referencję do właściwości materiału, Dzięki temu możemy je modyfikować z poziomu __call__
-        """
-        self.actor_property = actor_property
+    def opacity_callback(caller, ev):
+        value = get_value()
+        # Pomiń zdarzenia które praktycznie nie zmieniają wartości (drobny ruch myszy).
+        # Porównujemy z aktualnym opacity materiału, a nie z poprzednią wartością
+        # suwaka, bo tryby w SliderToggleCallback zmieniają opacity z pominięciem suwaka
+        if abs(value - get_opacity()) >= 1e-3:
+            set_opacity(value)
+    
+    return opacity_callback
 
-    def __call__(self, caller, ev):
-        """
-        Wywoływane automatycznie gdy użytkownik przesuwa suwak.
-        
-        Argumenty:
-            caller: Widget suwaka który wywołał callback (vtkSliderWidget)
-            ev: Typ zdarzenia (string, np. 'InteractionEvent')
-                W praktyce ignorujemy ten parametr bo wiemy że to suwak
-        """
-        # Pobierz aktualną wartość z suwaka
-        # GetRepresentation() zwraca vtkSliderRepresentation2D
-        # GetValue() zwraca float w zakresie min-max (zazwyczaj 0.0-1.0)
-        value = caller.GetRepresentation().GetValue()
-        
-        # Ustaw nową przezroczystość materiału
-        # 0.0 = całkowicie przezroczysty (niewidoczny)
-        # 1.0 = całkowicie nieprzezroczysty (widoczny w pełni)
-        self.actor_property.SetOpacity(value)
-        
-        # VTK odświeża widok automatycznie
+
+def make_interaction_pause_callbacks(widget, render_window):
+    """
+    Tworzy parę callbacków wyłączających widget na czas obracania/przesuwania kamery.
+    
+    Widget pomocniczy (np. vtkCameraOrientationWidget) przerysowuje swoją
+    mini-scenę przy każdym ruchu kamery. Podczas interakcji go wyłączamy, a po
+    jej zakończeniu włączamy z powrotem i odświeżamy widok raz.
+    
+    Argumenty:
+        widget (vtkAbstractWidget): Widget do wyłączania podczas interakcji
+        render_window (vtkRenderWindow): Okno do odświeżenia po interakcji
+    
+    Returns:
+        tuple: (pause_callback, resume_callback) - dla StartInteractionEvent i
+            EndInteractionEvent stylu interakcji
+    
+    Przykład:
+        >>> pause, resume = make_interaction_pause_callbacks(cow, win)
+        >>> style.AddObserver('StartInteractionEvent', pause)
+        >>> style.AddObserver('EndInteractionEvent', resume)
+    """
+    def pause_callback(caller, ev):
+        widget.Off()
+    
+    def resume_callback(caller, ev):
+        widget.On()
+        render_window.Render()
+    
+    return pause_callback, resume_callback
 
 
 class SlicePlaneCallback:
     """
     Callback dla suwaków kontrolujących pozycję płaszczyzn przekroju (slice planes).
     
-    Ten bardziej skomplikowany callback regeneruje płaszczyznę przekroju gdy użytkownik
-    przesuwa suwak. Musi wykonać reslicing (wycięcie 2D z objętości 3D) zarówno dla
-    obrazu w skali szarości jak i dla kolorowych etykiet segmentacji.
+    Przesuwa płaszczyznę przekroju gdy użytkownik przesuwa suwak. Przekroje
+    (obraz w skali szarości i kolorowe etykiety) wycina vtkImageResliceMapper
+    przy renderowaniu, więc callback zmienia tylko początek wspólnej vtkPlane.
     
     PROCES :
     1. Użytkownik przesuwa suwak X/Y/Z Slice
     2. Odczytujemy nową pozycję (numer slice'a)
-    3. Tworzymy nowe filtry reslice z zaktualizowaną pozycją
-    4. Obliczamy nową transformację przestrzenną (rotacje + przesunięcie)
-    5. Generujemy nowe obrazy 2D (szary + etykiety)
-    6. Aktualizujemy aktory żeby wyświetlały nowe obrazy
+    3. Przeliczamy numer slice'a na pozycję w mm
+    4. Przesuwamy płaszczyznę - mapper wytnie nowy przekrój przy najbliższym renderze
+    
+    RENDEROWANIE:
+    Callback sam nie renderuje. vtkSliderWidget po wysłaniu InteractionEvent
+    (i EndInteractionEvent) sam odświeża okno, a przesunięcie płaszczyzny to
+    tylko SetOrigin() - nowy przekrój pojawia się w tym samym renderze co
+    uchwyt suwaka, bez dodatkowego Render() i bez opóźnienia.
     
     Atrybuty:
         reader (vtkNrrdReader): Źródło danych obrazowych (CT/MRI)
         label_reader (vtkNrrdReader): Źródło etykiet segmentacji
-        image_actor_gray (vtkImageActor): Aktor wyświetlający obraz w sakli szarości
-        image_actor_labels (vtkImageActor): Aktor wyświetlający etykiety
+        image_actor_gray (vtkImageSlice): Aktor wyświetlający obraz w sakli szarości
+        image_actor_labels (vtkImageSlice): Aktor wyświetlający etykiety
         orientation (str): Orientacja płaszczyzny ('XY', 'XZ', lub 'YZ')
-        transform (vtkTransform): Transformacja przestrzenna płaszczyzny
-        lut (vtkLookupTable): Tablica kolorów dla etykiet
+        plane (vtkPlane): Płaszczyzna przekroju wspólna dla obu mapperów
         spacing (tuple): Odstępy między voxelami w mm
         origin (tuple): Punkt odniesienia w przestrzeni
-        dims (tuple): Rozmiary objętości w voxelach (
+        dims (tuple): Rozmiary objętości w voxelach
     """
     
     def __init__(self, reader, label_reader, image_actor_gray, image_actor_labels, 
-                 orientation, transform, lut):
+                 orientation, plane):
         """
         Inicjalizuje callback z wszystkimi potrzebnymi obiektami VTK.
         
@@ -118,8 +162,7 @@ class SlicePlaneCallback:
             image_actor_gray: Aktor do wyświetlania obrazu w skali szarości
             image_actor_labels: Aktor do wyświetlania etykiet 
             orientation: 'XY', 'XZ' lub 'YZ'
-            transform: Transformacja przestrzenna do aktualizacji
-            lut: Lookup table dla kolorowania etykiet
+            plane: Płaszczyzna przekroju z create_slice_plane
         """
         # Zapamiętaj wszystkie obiekty (będziemy ich potrzebować w __call__)
         self.reader = reader
@@ -127,13 +170,17 @@ class SlicePlaneCallback:
         self.image_actor_gray = image_actor_gray
         self.image_actor_labels = image_actor_labels
         self.orientation = orientation
-        self.transform = transform
-        self.lut = lut
+        self.plane = plane
         
         #Pobierz właściwości geometryczne obrazu
         
-        # Upewnij się że dane są zaktualizowane
-        self.reader.Update()
+        # Wczytaj CAŁĄ objętość do pamięci (a nie tylko fragment potrzebny dla
+        # pierwszego slice'a). Dane są ułożone "Z-major", więc przekrój YZ/XZ
+        # na częściowo wczytanym extencie wymuszałby ponowne wykonanie readera.
+        # Robimy to raz, tutaj - wszystkie trzy orientacje czytają potem z RAM.
+        self.reader.UpdateWholeExtent()
+        if self.label_reader:
+            self.label_reader.UpdateWholeExtent()
         image_data = self.reader.GetOutput()
         
         # Spacing - odstępy między voxelami w mm (rozdzielczość przestrzenna)
@@ -147,11 +194,23 @@ class SlicePlaneCallback:
         # Przykład: (512, 512, 200) = 512x512 pikseli, 200 slice'ów
         self.dims = image_data.GetDimensions()
         
+        # Parametry gorącej ścieżki __call__ - indeks osi, znak i połowa wymiaru
+        axis, sign = SLICE_AXES[orientation]
+        self._axis = axis
+        self._sign = sign
+        self._half = self.dims[axis] // 2
+        self._axis_spacing = self.spacing[axis]
+        
+        # Tablica pozycji w mm dla każdego slice'a wewnątrz objętości
+        # (indeks * spacing) - w __call__ wystarczy ją zindeksować
+        self._positions = tuple(i * self._axis_spacing for i in range(self.dims[axis]))
+        
+        # Ostatnio ustawiony numer slice'a (None = jeszcze nie ustawiony)
+        self._last_value = None
+        
     def __call__(self, caller, ev):
         """
-        Wywoływane gdy użytkownik przesuwa suwak pozycji slice'a.
-        
-        Regeneruje całą płaszczyznę przekroju w nowej pozycji.
+        Wywoływane gdy użytkownik przesuwa (lub puszcza) suwak pozycji slice'a.
         
         Argumenty:
             caller: Widget suwaka (vtkSliderWidget)
@@ -163,131 +222,46 @@ class SlicePlaneCallback:
         # Pobierz wartość z suwaka i zamień na int (numery slice'ów to floaty)
         value = int(caller.GetRepresentation().GetValue())
         
-        # 2: Stwórz nowy filtr reslice dla obrazu szarościowego
-        
-        reslice = vtkImageReslice()
-        reslice.SetInputConnection(self.reader.GetOutputPort())
-        # Wymiar wyjściowy = 2D (płaski obraz, nie objętość)
-        reslice.SetOutputDimensionality(2)
-        
-        # 3: stwórz reslice dla etykiet
-        
-        reslice_labels = None
-        if self.label_reader:
-            reslice_labels = vtkImageReslice()
-            reslice_labels.SetInputConnection(self.label_reader.GetOutputPort())
-            reslice_labels.SetOutputDimensionality(2)
-            # Etykiety interpolujemy metodą najbliższego sąsiada
-            reslice_labels.SetInterpolationModeToNearestNeighbor()
-        
-        # 4: Zresetuj transformację 
-        
-        # Zacznij od czystej transformacji (jednostkowa macierz)
-        self.transform.Identity()
-        # Zastosuj bazowe odbicie lustrzane (konwersja układów współrzędnych)
-        self.transform.Scale(1, -1, -1)
-        
-        # 5: Ustaw orientację i pozycję w zależności od typu płaszczyzny 
-        
-        if self.orientation == 'XY':
-            # PŁASZCZYZNA XY 
-            # Patrzymy wzdłuż osi Z (od góry lub dołu ciała)
-            
-            # Direction cosines - osie lokalne równoległe do globalnych
-            direction_cosines = (1, 0, 0, 0, 1, 0, 0, 0, 1)
-            reslice.SetResliceAxesDirectionCosines(*direction_cosines)
-            if reslice_labels:
-                reslice_labels.SetResliceAxesDirectionCosines(*direction_cosines)
-            
-            # Przelicz numer slice'a na indeks absolutny
-            # value jest względem środka, więc dodajemy połowę wymiaru
-            actual_slice = value + self.dims[2] // 2
-            
-            # Przelicz indeks na pozycję w mm
-            z_pos = actual_slice * self.spacing[2]
-            
-            # Ustaw punkt odniesienia dla płaszczyzny reslice
-            reslice.SetResliceAxesOrigin(0, 0, z_pos)
-            if reslice_labels:
-                reslice_labels.SetResliceAxesOrigin(0, 0, z_pos)
-            
-            # Zaktualizuj transformację (przesunięcie w Z)
-            self.transform.Translate(0, 0, -z_pos)
-            
-        elif self.orientation == 'XZ':
-            # PŁASZCZYZNA XZ 
-            # Patrzymy wzdłuż osi Y (od przodu lub tyłu)
-            
-            # Direction cosines z odbiciem X (dla lepszej anatomicznej orientacji)
-            direction_cosines = (-1, 0, 0, 0, 0, 1, 0, 1, 0)
-            reslice.SetResliceAxesDirectionCosines(*direction_cosines)
-            if reslice_labels:
-                reslice_labels.SetResliceAxesDirectionCosines(*direction_cosines)
-            
-            # Dla XZ używamy ujemnego value (taką konwencje przyjłem dla ładniejszego wyświetlania się danych)
-            actual_slice = -value + self.dims[1] // 2
-            y_pos = actual_slice * self.spacing[1]
-            
-            reslice.SetResliceAxesOrigin(0, y_pos, 0)
-            if reslice_labels:
-                reslice_labels.SetResliceAxesOrigin(0, y_pos, 0)
-            
-            # Rotacje dla prawidłowej orientacji anatomicznej
-            self.transform.RotateX(90)   # Obróć żeby Z wskazywało w górę
-            self.transform.RotateZ(180)  # Obróć dla lewej/prawej strony
-            self.transform.Translate(0, 0, -y_pos)
-            
-        elif self.orientation == 'YZ':
-            # PŁASZCZYZNA YZ 
-            # Patrzymy wzdłuż osi X (z boku ciała)
-            
-            direction_cosines = (0, 1, 0, 0, 0, 1, 1, 0, 0)
-            reslice.SetResliceAxesDirectionCosines(*direction_cosines)
-            if reslice_labels:
-                reslice_labels.SetResliceAxesDirectionCosines(*direction_cosines)
-            
-            actual_slice = value + self.dims[0] // 2
-            x_pos = actual_slice * self.spacing[0]
-            
-            reslice.SetResliceAxesOrigin(x_pos, 0, 0)
-            if reslice_labels:
-                reslice_labels.SetResliceAxesOrigin(x_pos, 0, 0)
-            
-            # Rotacje dla widoku sagitalnego
-            self.transform.RotateY(-90)  # Obróć na widok z boku
-            self.transform.RotateZ(90)   # Obróć żeby góra była na górze
-            self.transform.Translate(0, 0, -x_pos)
-        
-        # 6: Wykonaj reslicing (wygeneruj obrazy 2D) 
-        
-        reslice.Update()
-        if reslice_labels:
-            reslice_labels.Update()
-        
-        # 7: Zaktualizuj aktor z obrazem szarościowym 
-        
-        # Podłącz nowy reslice jako źródło danych dla aktora
-        self.image_actor_gray.GetMapper().SetInputConnection(reslice.GetOutputPort())
+        # Przesuń płaszczyznę - okno odświeży sam widget suwaka
+        self.set_slice(value)
+    
+    def set_slice(self, value):
+        """
+        Przesuwa płaszczyznę przekroju na slice o podanym numerze.
         
-        # 8: Opcjonalnie zaktualizuj aktor z etykietami 
+        Argumenty:
+            value (int): Numer slice'a względem środka objętości
         
-        if self.image_actor_labels and reslice_labels:
-            # Zamień wartości liczbowe (etykiety) na kolory
-            map_to_colors = vtkImageMapToColors()
-            map_to_colors.SetInputConnection(reslice_labels.GetOutputPort())
-            map_to_colors.SetLookupTable(self.lut)
-            
-            # Format wyjściowy RGBA (z kanałem Alpha dla przezroczystości)
-            map_to_colors.SetOutputFormatToRGBA()
-            map_to_colors.PassAlphaToOutputOn()
-            map_to_colors.Update()
-
-            # Podłącz do aktora
-            self.image_actor_labels.GetMapper().SetInputConnection(map_to_colors.GetOutputPort())
-            # Wyłącz interpolację dla ostrych krawędzi etykiet
-            self.image_actor_labels.InterpolateOff()
+        Returns:
+            bool: True jeśli płaszczyzna została przesunięta
+        """
         
-        # VTK automatycznie odświeży widok
+        # Sąsiednie pozycje myszy często dają ten sam numer slice'a po zaokrągleniu -
+        # wtedy płaszczyzna jest już na miejscu i nie ma czego przeliczać
+        if value == self._last_value:
+            return False
+        self._last_value = value
+        
+        # 2: Przelicz numer slice'a na pozycję w mm
+        
+        # value jest względem środka, więc dodajemy połowę wymiaru żeby dostać
+        # indeks absolutny, a potem odczytujemy pozycję z tablicy
+        actual_slice = self._sign * value + self._half
+        if 0 <= actual_slice < len(self._positions):
+            pos = self._positions[actual_slice]
+        else:
+            # Zakres suwaka wychodzi poza objętość - liczymy pozycję wprost
+            pos = actual_slice * self._axis_spacing
+        origin = [0, 0, 0]
+        origin[self._axis] = pos
+        
+        # 3: Przesuń płaszczyznę
+        
+        # Oba mappery (obraz i etykiety) używają tej samej płaszczyzny, a
+        # vtkImageResliceMapper wycina przekrój przy renderowaniu - ukryte
+        # etykiety (klawisz 'L') nie są w ogóle liczone.
+        self.plane.SetOrigin(origin)
+        return True
 
 
 class SliderToggleCallback:
@@ -306,6 +280,15 @@ class SliderToggleCallback:
     
     Przełączanie między trybami jest cykliczne (0->1->2->3->0)
     
+    Modele 3D w trybie 3 liczą się kilka sekund, dlatego obliczenia idą na wątek
+    w tle, a okno dalej reaguje. Aktory dodajemy do sceny dopiero na głównym
+    wątku - timer interaktora co 50 ms sprawdza czy wynik jest gotowy.
+    
+    Przy zamknięciu aplikacji (ExitEvent interaktora) pula wątków jest zamykana
+    bez czekania, a zlecenia z kolejki są anulowane. Obliczenia, które już się
+    zaczęły, nie dają się przerwać - trwający build zostanie dokończony (proces
+    zakończy się dopiero po nim), ale jego wynik jest ignorowany.
+    
     Atrybuty:
         sliders (dict): Słownik wszystkich suwaków {nazwa: widget}
         label_actors (dict): Słownik aktorów etykiet na slice'ach
@@ -316,9 +299,18 @@ class SliderToggleCallback:
         iren (vtkRenderWindowInteractor): Interaktor (do tworzenia nowych suwaków)
         mode_state (int): Aktualny tryb (0-3)
         segmentation_actors (list): Lista aktorów modeli segmentacji (tryb 3)
-        segmentation_sliders (dict): Suwaki dla modeli segmentacji (tryb 3)
+        segmentation_labels (list): Numery etykiet modeli (tryb 3)
+        segmentation_sliders (list): Suwaki dla modeli segmentacji (tryb 3)
+        segmentation_properties (list): Właściwości materiału modeli (tryb 3)
+        
+    Stan trybu 3 jest trzymany w równoległych listach (indeks i w każdej liście
+    dotyczy tego samego modelu), więc operacje na wszystkich suwakach/modelach
+    to zwykła pętla po jednej liście, bez słowników.
     """
     
+    # Co ile milisekund sprawdzamy czy modele 3D są już policzone
+    SEGMENTATION_POLL_MS = 50
+    
     def __init__(self, sliders, label_actors=None, mesh_actors_dict=None, 
                  label_reader=None, renderer=None, lut=None, iren=None):
         """
@@ -342,134 +334,269 @@ class SliderToggleCallback:
         self.lut = lut
         self.iren = iren
         
+        # Listy budowane raz - obsługa klawiszy iteruje po gotowych listach
+        # zamiast po słownikach (i bez filtrowania po nazwach przy każdym naciśnięciu)
+        self._all_sliders = list(self.sliders.values())
+        self._non_slice_sliders = [slider for name, slider in self.sliders.items()
+                                   if name not in ('X Slice', 'Y Slice', 'Z Slice')]
+        self._mesh_actors = list(self.mesh_actors_dict.values())
+        # Dla każdego mesh'a: (aktor, właściwości materiału, reprezentacja suwaka
+        # opacity lub None) - przełączanie trybów nie musi już pytać VTK o te obiekty
+        self._mesh_bundle = [
+            (actor, actor.GetProperty(),
+             self.sliders[name].GetRepresentation() if name in self.sliders else None)
+            for name, actor in self.mesh_actors_dict.items()
+        ]
+        # Aktory etykiet mogą być None (brak pliku z etykietami) - od razu je pomijamy
+        self._label_actors = [actor for actor in self.label_actors.values() if actor]
+        
+        # Tablica skrótów klawiszowych: keysym -> metoda obsługi
+        # (mała i wielka litera, żeby nie wywoływać .lower() przy każdym naciśnięciu)
+        self._key_dispatch = {}
+        for key, handler in (('n', self.toggle_sliders),
+                             ('l', self.toggle_labels),
+                             ('m', self.cycle_mode)):
+            self._key_dispatch[key] = handler
+            self._key_dispatch[key.upper()] = handler
+        
         # Stan wewnętrzny
         self.mode_state = 0                    # Zaczynamy w trybie normalnym
         self.segmentation_actors = []          # Lista modeli 3D (tryb 3)
-        self.segmentation_sliders = {}         # Suwaki dla modeli 3D (tryb 3)
+        self.segmentation_labels = []          # Numery etykiet modeli 3D (tryb 3)
+        self.segmentation_sliders = []         # Suwaki dla modeli 3D (tryb 3)
+        self.segmentation_properties = []      # Materiały modeli 3D (tryb 3)
+        
+        # Obliczenia modeli 3D w tle (jeden wątek - kolejne zlecenia czekają w kolejce)
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._seg_future = None                # Trwające obliczenia (Future lub None)
+        self._seg_timer_id = None              # Timer interaktora sprawdzający wynik
+        self._seg_timer_tag = None             # Tag obserwatora TimerEvent
+        
+        # Przy wyjściu z aplikacji ('q', zamknięcie okna) zamknij pulę wątków
+        if self.iren:
+            self.iren.AddObserver('ExitEvent', self.shutdown)
         
     def __call__(self, caller, ev):
         """
         Wywoływane gdy użytkownik naciska klawisz.
         
+        Obsługę klawisza wybieramy z tablicy self._key_dispatch (budowanej raz
+        w __init__) - nowy skrót to po prostu nowy wpis w tablicy.
+        
         Argumenty:
             caller: Interactor (vtkRenderWindowInteractor)
             ev: Typ zdarzenia ('KeyPressEvent')
         """
+        handler = self._key_dispatch.get(caller.GetKeySym())
+        if handler:
+            handler(caller)
+    
+    def toggle_sliders(self, caller):
+        """
+        Klawisz 'N' - pokazuje/ukrywa wszystkie suwaki.
         
-        # Pobierz nazwę naciśniętego klawisza i zamień na lowercase
-        key = caller.GetKeySym().lower()
-        
-        # OBSŁUGA KLAWISZA 'N' - toggle suwaków 
-        
-        if key == "n":
-            # Przełącz widoczność WSZYSTKICH suwaków
-            for v in self.sliders.values():
-                # Jeśli suwak był włączony, wyłącz go (i odwrotnie)
-                v.SetEnabled(not v.GetEnabled())
-        
-        # OBSŁUGA KLAWISZA 'L' - toggle etykiet 
-                    
-        elif key == "l" and self.label_actors:
-            # Przełącz widoczność etykiet na slice'ach
-            for actor in self.label_actors.values():
-                if actor:  # Sprawdź czy aktor istnieje (może być None)
-                    # Przełącz widoczność
-                    actor.SetVisibility(not actor.GetVisibility())
-
-        # OBSŁUGA KLAWISZA 'M' - zmiana trybu 
+        Argumenty:
+            caller: Interactor (vtkRenderWindowInteractor)
+        """
+        for v in self._all_sliders:
+            # Jeśli suwak był włączony, wyłącz go (i odwrotnie)
+            v.SetEnabled(not v.GetEnabled())
+    
+    def toggle_labels(self, caller):
+        """
+        Klawisz 'L' - pokazuje/ukrywa etykiety na slice'ach.
         
-        elif key == "m":
-            # Przejdź do następnego trybu (cyklicznie 0→1→2→3→0)
-            self.mode_state = (self.mode_state + 1) % 4
+        Argumenty:
+            caller: Interactor (vtkRenderWindowInteractor)
+        """
+        for actor in self._label_actors:
+            # Przełącz widoczność
+            actor.SetVisibility(not actor.GetVisibility())
+    
+    def cycle_mode(self, caller):
+        """
+        Klawisz 'M' - przełącza na następny tryb wyświetlania (0→1→2→3→0).
+        
+        Argumenty:
+            caller: Interactor (vtkRenderWindowInteractor)
+        """
+        # Przejdź do następnego trybu (cyklicznie 0→1→2→3→0)
+        self.mode_state = (self.mode_state + 1) % 4
+        
+        # ---------------- TRYB 3: MODEL 3D SEGMENTACJI 
+        if self.mode_state == 3:
+            # Ukryj suwaki tkanek (ale bez ukrywania suwaków płaszczyzn)
+            for slider in self._non_slice_sliders:
+                slider.SetEnabled(False)
             
-            # ---------------- TRYB 3: MODEL 3D SEGMENTACJI 
-            if self.mode_state == 3:
-                # Ukryj suwaki tkanek (ale bez ukrywania suwaków płaszczyzn)
-                for name, slider in self.sliders.items():
-                    if name not in ['X Slice', 'Y Slice', 'Z Slice']:
-                        slider.SetEnabled(False)
-                
-                # Ukryj oryginalne mesh'e tkanek
-                for actor in self.mesh_actors_dict.values():
-                    actor.SetVisibility(False)
-                
-                # Wygeneruj modele 3D z segmentacji
-                if self.label_reader and self.renderer and self.lut:
-                    self.segmentation_actors = create_segmentation_3d_model(
-                        self.label_reader, self.lut, self.renderer, 
-                        self.mesh_actors_dict,
-                        similarity_threshold=0.0  # 0.0 = wyłącz wykrywanie duplikatów - wyjaśnienia o co chodzi z duplikatami w geometry utils.py
-                    )
-                    # Stwórz suwaki dla wygenerowanych modeli
-                    self.create_segmentation_sliders()
+            # Ukryj oryginalne mesh'e tkanek
+            for actor in self._mesh_actors:
+                actor.SetVisibility(False)
             
-            # ---------------- TRYB 0: NORMALNY       
-            elif self.mode_state == 0:
-                # Usuń suwaki modeli segmentacji
-                self.remove_segmentation_sliders()
-                
-                # Pokaż wszystkie oryginalne suwaki
-                for slider in self.sliders.values():
-                    slider.SetEnabled(True)
-                
-                # Usuń modele 3D segmentacji
-                for actor in self.segmentation_actors:
-                    self.renderer.RemoveActor(actor)
-                self.segmentation_actors = []
-                
-                # Przywróć oryginalne siatki
-                for name, actor in self.mesh_actors_dict.items():
-                    actor.SetVisibility(True)
-                    prop = actor.GetProperty()
-                    prop.SetRepresentationToSurface()  # Normalna powierzchnia
-                    
-                    # Przywróć opacity z suwaka (jeśli istnieje)
-                    if name in self.sliders:
-                        val = self.sliders[name].GetRepresentation().GetValue()
-                        prop.SetOpacity(val)
-                    else:
-                        prop.SetOpacity(1.0)
-                
-                # Upewnij się że slice'y są widoczne
-                for actor in self.label_actors.values():
-                    if actor:
-                        actor.SetVisibility(True)
+            # Wygeneruj modele 3D z segmentacji (w tle - aktory i suwaki
+            # dodaje _on_segmentation_timer gdy obliczenia się skończą)
+            if self.label_reader and self.renderer and self.lut:
+                self.start_segmentation_build()
+        
+        # ---------------- TRYB 0: NORMALNY       
+        elif self.mode_state == 0:
+            # Porzuć ewentualne trwające obliczenia modeli 3D
+            self.stop_segmentation_build()
             
-            # ----------------- TRYB 1 i 2: WIREFRAME / TRANSPARENT            
-            else:
-                # Usuń ewentualne suwaki i modele segmentacji
-                self.remove_segmentation_sliders()
-                
-                # Pokaż wszystkie oryginalne suwaki
-                for slider in self.sliders.values():
-                    slider.SetEnabled(True)
-                
-                # Usuń modele 3D segmentacji
-                for actor in self.segmentation_actors:
-                    self.renderer.RemoveActor(actor)
-                self.segmentation_actors = []
+            # Usuń suwaki modeli segmentacji
+            self.remove_segmentation_sliders()
+            
+            # Pokaż wszystkie oryginalne suwaki
+            for slider in self._all_sliders:
+                slider.SetEnabled(True)
+            
+            # Usuń modele 3D segmentacji
+            for actor in self.segmentation_actors:
+                self.renderer.RemoveActor(actor)
+            self.segmentation_actors = []
+            
+            # Przywróć oryginalne siatki
+            for actor, prop, rep in self._mesh_bundle:
+                actor.SetVisibility(True)
+                prop.SetRepresentationToSurface()  # Normalna powierzchnia
                 
-                # Pokaż oryginalne mesh'e w odpowiednim stylu
-                for actor in self.mesh_actors_dict.values():
-                    actor.SetVisibility(True)
-                    prop = actor.GetProperty()
-                    
-                    if self.mode_state == 1:
-                        # WIREFRAME: tylko krawędzie, pełna nieprzezroczystość
-                        prop.SetRepresentationToWireframe()
-                        prop.SetOpacity(1.0)
-                    elif self.mode_state == 2:
-                        # TRANSPARENT: powierzchnia, prawie przezroczysta
-                        prop.SetRepresentationToSurface()
-                        prop.SetOpacity(0.01)  # 1% nieprzezroczystości
+                # Przywróć opacity z suwaka (jeśli istnieje)
+                prop.SetOpacity(rep.GetValue() if rep is not None else 1.0)
+            
+            # Upewnij się że slice'y są widoczne
+            for actor in self._label_actors:
+                actor.SetVisibility(True)
+        
+        # ----------------- TRYB 1 i 2: WIREFRAME / TRANSPARENT            
+        else:
+            # Usuń ewentualne suwaki i modele segmentacji
+            self.stop_segmentation_build()
+            self.remove_segmentation_sliders()
+            
+            # Pokaż wszystkie oryginalne suwaki
+            for slider in self._all_sliders:
+                slider.SetEnabled(True)
+            
+            # Usuń modele 3D segmentacji
+            for actor in self.segmentation_actors:
+                self.renderer.RemoveActor(actor)
+            self.segmentation_actors = []
+            
+            # Pokaż oryginalne mesh'e w odpowiednim stylu
+            for actor, prop, _ in self._mesh_bundle:
+                actor.SetVisibility(True)
                 
-                # Upewnij się że slice'y są widoczne
-                for actor in self.label_actors.values():
-                    if actor:
-                        actor.SetVisibility(True)
+                if self.mode_state == 1:
+                    # WIREFRAME: tylko krawędzie, pełna nieprzezroczystość
+                    prop.SetRepresentationToWireframe()
+                    prop.SetOpacity(1.0)
+                elif self.mode_state == 2:
+                    # TRANSPARENT: powierzchnia, prawie przezroczysta
+                    prop.SetRepresentationToSurface()
+                    prop.SetOpacity(0.01)  # 1% nieprzezroczystości
             
-            # Odśwież widok żeby pokazać zmiany
-            caller.GetRenderWindow().Render()
+            # Upewnij się że slice'y są widoczne
+            for actor in self._label_actors:
+                actor.SetVisibility(True)
+        
+        # Odśwież widok żeby pokazać zmiany - jedyny Render() przy zmianie trybu
+        caller.GetRenderWindow().Render()
+
+    def start_segmentation_build(self):
+        """
+        Zleca wygenerowanie modeli 3D segmentacji na wątku w tle.
+        
+        Na wątek trafiają tylko obliczenia (compute_segmentation_polydata).
+        Renderer VTK nie jest bezpieczny wątkowo, więc AddActor, suwaki i Render()
+        wykonuje _on_segmentation_timer na głównym wątku.
+        """
+        # Porzuć poprzednie zlecenie (np. szybkie wielokrotne naciśnięcie 'M')
+        self.stop_segmentation_build()
+        
+        # Dane czytamy na głównym wątku, a wątek w tle dostaje płytką kopię obrazu -
+        # dzięki temu nie uruchamia pipeline'u readera (z którego korzystają też slice'y)
+        self.label_reader.Update()
+        image_data = vtkImageData()
+        image_data.ShallowCopy(self.label_reader.GetOutput())
+        
+        self._seg_future = self._executor.submit(
+            compute_segmentation_polydata, image_data,
+            0.0  # 0.0 = wyłącz wykrywanie duplikatów - wyjaśnienia o co chodzi z duplikatami w geometry utils.py
+        )
+        
+        # Bez interaktora nie mamy timera - czekamy na wynik synchronicznie
+        if not self.iren:
+            self.finish_segmentation_build()
+            return
+        
+        # Sprawdzaj co SEGMENTATION_POLL_MS czy wynik jest gotowy
+        self._seg_timer_tag = self.iren.AddObserver('TimerEvent', self._on_segmentation_timer)
+        self._seg_timer_id = self.iren.CreateRepeatingTimer(self.SEGMENTATION_POLL_MS)
+    
+    def stop_segmentation_build(self):
+        """
+        Zatrzymuje sprawdzanie wyniku i porzuca trwające obliczenia modeli 3D.
+        
+        Jeśli obliczenia już się zaczęły, wątek je dokończy, ale wynik zostanie zignorowany.
+        """
+        if self._seg_timer_id is not None:
+            self.iren.DestroyTimer(self._seg_timer_id)
+            self._seg_timer_id = None
+        if self._seg_timer_tag is not None:
+            self.iren.RemoveObserver(self._seg_timer_tag)
+            self._seg_timer_tag = None
+        if self._seg_future is not None:
+            self._seg_future.cancel()
+            self._seg_future = None
+    
+    def shutdown(self, caller=None, ev=None):
+        """
+        Zamyka pulę wątków obliczeń modeli 3D (obserwator ExitEvent interaktora).
+        
+        Zlecenia czekające w kolejce są anulowane, a wywołanie nie czeka na wątek.
+        Build, który już trwa, nie może zostać przerwany - zostanie dokończony
+        w tle, a wynik zignorowany.
+        
+        Interaktor z obserwatorem ExitEvent nie kończy pętli zdarzeń sam
+        (vtkRenderWindowInteractor::ExitCallback), więc robimy to tutaj.
+        
+        Argumenty:
+            caller: Interactor (vtkRenderWindowInteractor) lub None
+            ev: Typ zdarzenia ('ExitEvent') lub None
+        """
+        self.stop_segmentation_build()
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if caller is not None:
+            caller.TerminateApp()
+    
+    def finish_segmentation_build(self):
+        """
+        Dodaje policzone modele 3D do sceny i tworzy dla nich suwaki.
+        
+        Musi być wywołane na głównym wątku. Blokuje, jeśli wynik nie jest jeszcze gotowy.
+        """
+        future = self._seg_future
+        self.stop_segmentation_build()
+        
+        self.segmentation_actors = create_segmentation_actors(
+            future.result(), self.lut, self.renderer)
+        # Stwórz suwaki dla wygenerowanych modeli
+        self.create_segmentation_sliders()
+    
+    def _on_segmentation_timer(self, caller, ev):
+        """
+        Obserwator TimerEvent - gdy modele 3D są gotowe, dodaje je do sceny.
+        
+        Argumenty:
+            caller: Interactor (vtkRenderWindowInteractor)
+            ev: Typ zdarzenia ('TimerEvent')
+        """
+        if self._seg_future is None or not self._seg_future.done():
+            return
+        
+        self.finish_segmentation_build()
+        # Odśwież widok żeby pokazać nowe modele
+        caller.GetRenderWindow().Render()
     
     def create_segmentation_sliders(self):
         """
@@ -477,6 +604,7 @@ class SliderToggleCallback:
         
         Wywoływane w trybie 3 po wygenerowaniu modeli 3D.
         Każdy model dostaje swój suwak w tym samym kolorze co model.
+        Nie odświeża widoku - to zadanie wywołującego (jeden Render() po wszystkich zmianach).
         """
         # Sprawdź czy mamy wszystko co potrzebne
         if not self.segmentation_actors or not self.iren:
@@ -484,29 +612,22 @@ class SliderToggleCallback:
         
         # Dla każdego wygenerowanego modelu stwórz suwak
         for idx, actor in enumerate(self.segmentation_actors):
-            # Pobierz numer etykiety z aktora (zapamiętany w create_segmentation_3d_model)
+            # Pobierz numer etykiety z aktora (zapamiętany w create_segmentation_actors)
             label_value = actor._label_value
+            prop = actor.GetProperty()
             
             # Stwórz properties dla suwaka
             sp = SliderProperties()
             sp.title = f"Seg {label_value}"  # Tytuł: "Seg 5", "Seg 12" itd.
             sp.value_initial = 0.9           # Zaczynaj od 90% nieprzezroczystości
             
-            # Oblicz pozycję suwaka (układ w dwie kolumny)
-            col = idx % 2        # Kolumna: 0 lub 1
-            row = idx // 2       # Rząd: 0, 1, 2, ...
-            y = top_y - row * step_y  # Y = 0.80, 0.755, 0.71, ...
-            
-            # Ustaw współrzędne zależnie od kolumny
-            if col == 0:
-                sp.p1 = [right_x0_col1, y]
-                sp.p2 = [right_x1_col1, y]
-            else:
-                sp.p1 = [right_x0_col2, y]
-                sp.p2 = [right_x1_col2, y]
+            # Pozycja suwaka z gotowej tablicy (układ w dwie kolumny)
+            x0, x1, y = _SEGMENTATION_SLIDER_POSITIONS[idx]
+            sp.p1 = (x0, y)
+            sp.p2 = (x1, y)
             
             # Pobierz kolor modelu (taki sam kolor będzie miał tytuł suwaka)
-            color = actor.GetProperty().GetColor()
+            color = prop.GetColor()
             
             # Stwórz widget suwaka z tym kolorem
             slider_widget = make_slider_widget_with_color(sp, color)
@@ -514,24 +635,34 @@ class SliderToggleCallback:
             slider_widget.EnabledOn()
             
             # Podłącz callback do zmiany opacity
+            # Każdy widget ma własną listę obserwatorów (z jednym wpisem), więc wspólny
+            # dispatcher dla wszystkich suwaków nic by nie skrócił - dodałby tylko
+            # wyszukiwanie w słowniku przy każdym zdarzeniu
             slider_widget.AddObserver(vtkCommand.InteractionEvent, 
-                                    SliderCallback(actor.GetProperty()))
+                                    make_opacity_callback(prop,
+                                                          slider_widget.GetRepresentation()))
             
-            # Zapamiętaj suwak
-            self.segmentation_sliders[label_value] = slider_widget
+            # Zapamiętaj stan w równoległych listach (ten sam indeks co w segmentation_actors)
+            self.segmentation_labels.append(label_value)
+            self.segmentation_sliders.append(slider_widget)
+            self.segmentation_properties.append(prop)
         
-        # Odśwież widok
-        self.iren.GetRenderWindow().Render()
+        # Nie renderujemy tutaj - robi to jeden Render() na końcu obsługi zdarzenia
     
     def remove_segmentation_sliders(self):
         """
         Usuwa wszystkie suwaki modeli segmentacji.
         
         Wywoływane przy wychodzeniu z trybu 3.
+        Nie odświeża widoku (wyłączenie widgetu w VTK nie wywołuje Render()).
         """
-        for slider in self.segmentation_sliders.values():
-            slider.SetEnabled(False)  # Wyłącz
-            slider.Off()              # Usuń z renderowania
-        self.segmentation_sliders.clear()  # Wyczyść słownik
+        for slider in self.segmentation_sliders:
+            # Wyłącz (Off() to to samo co SetEnabled(False) - drugie wywołanie
+            # niepotrzebnie przechodziło jeszcze raz przez obsługę wyłączania)
+            slider.SetEnabled(False)
+        # Wyczyść listy stanu suwaków
+        self.segmentation_labels.clear()
+        self.segmentation_sliders.clear()
+        self.segmentation_properties.clear()
 
 
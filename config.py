@@ -7,6 +7,9 @@ Zawiera wszystkie stałe konfiguracyjne używane w aplikacji, takie jak:
 - Pozycje suwaków w interfejsie użytkownika
 """
 
+import sys
+from types import MappingProxyType
+
 # =============================================================================
 # ŚCIEŻKI DO PLIKÓW DANYCH
 # =============================================================================
@@ -33,7 +36,9 @@ JSON_PATH = "Liver_vtk.json"
 # w kodzie i CLI, a aplikacja automatycznie znajdzie odpowiednie pliki.
 #
 # Struktura: "nazwa_uzywana_w_kodzie": "NazwaWStemPliku"
-TISSUE_TO_STEM = {
+#
+# Słownik jest tylko do odczytu (MappingProxyType) - niżej opakowujemy _TISSUE_TO_STEM
+_TISSUE_TO_STEM = {
     # Żyły główne
     "ivc": "IVC",                                   # Żyła główna dolna (Inferior Vena Cava)
     "caudate_veins": "CaudateVeins",                # Żyły płata ogoniastego
@@ -69,6 +74,13 @@ TISSUE_TO_STEM = {
     "aorta": "Aorta"                                # Aorta brzuszna
 }
 
+# Widok tylko do odczytu - przypadkowa modyfikacja w innym module rzuci TypeError.
+# Klucze i wartości są internowane (sys.intern), więc wyszukiwanie w słowniku
+# porównuje stringi po tożsamości obiektu zamiast znak po znaku.
+TISSUE_TO_STEM = MappingProxyType(
+    {sys.intern(k): sys.intern(v) for k, v in _TISSUE_TO_STEM.items()}
+)
+
 
 # =============================================================================
 # POZYCJE SUWAKÓW W INTERFEJSIE
@@ -28,54 +28,172 @@ STRUKTURA PLIKU JSON: zachęcam porównać z rzeczywistym plikiem!
 """
 
 import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, fields
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 
 from config import TISSUE_TO_STEM
 
+# Lista dostępnych tkanek do komunikatu błędu w resolve_vtk_file().
+# TISSUE_TO_STEM jest tylko do odczytu, więc tekst można złożyć raz przy imporcie.
+_TISSUE_KEYS_MSG = ", ".join(TISSUE_TO_STEM.keys())
 
-def parse_json(fn_path):
+# orjson jest opcjonalny - parsuje kilka razy szybciej niż json z biblioteki
+# standardowej. Jeśli nie jest zainstalowany, wracamy do json.loads.
+# Oba przyjmują bytes, a orjson.JSONDecodeError dziedziczy po json.JSONDecodeError,
+# więc obsługa błędów u wywołującego się nie zmienia.
+try:
+    import orjson
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# pyahocorasick jest opcjonalny - automat Aho-Corasick ze wszystkich tokenów
+# TISSUE_TO_STEM pozwala przejść każdą nazwę pliku raz i znaleźć wszystkie
+# pasujące tkanki naraz, zamiast sprawdzać każdy token osobno.
+# Bez biblioteki build_tissue_index() używa zwykłego przeszukiwania.
+try:
+    import ahocorasick
+except ImportError:
+    _TOKEN_AUTOMATON = None
+else:
+    _TOKEN_AUTOMATON = ahocorasick.Automaton()
+    _tissues_by_token = {}
+    for _tissue, _token in TISSUE_TO_STEM.items():
+        _tissues_by_token.setdefault(_token, []).append(_tissue)
+    for _token, _tissues in _tissues_by_token.items():
+        _TOKEN_AUTOMATON.add_word(_token, tuple(_tissues))
+    _TOKEN_AUTOMATON.make_automaton()
+    del _tissue, _token, _tissues, _tissues_by_token
+
+
+@dataclass(slots=True, frozen=True)
+class AtlasParams:
+    """
+    Parametry atlasu zwracane przez parse_json().
+    
+    Zamiast słownika używamy dataclass ze __slots__: odczyt params.names to
+    zwykły dostęp do atrybutu (bez haszowania klucza), a obiekt nie ma __dict__.
+    
+    Wynik parse_json() jest zapamiętywany w cache i współdzielony między
+    wywołaniami, więc musi być tylko do odczytu: frozen=True blokuje przypisanie
+    atrybutu, a kontenery są zapisane jako krotki i widoki MappingProxyType
+    (params.names.append() czy params.opacity[...] = ... rzucą wyjątek).
+    Dotyczy to pierwszego poziomu - wartości w słownikach to liczby, stringi i Path.
+    
+    dataclass(slots=True) wymaga Pythona 3.10+.
+    
+    Atrybuty:
+        vtk_files (MappingProxyType): {stem: Path} - mapowanie nazw plików na pełne ścieżki
+        tissue_index (MappingProxyType): {tkanka: Path} - gotowe dopasowania z build_tissue_index()
+        names (tuple): Nazwy tkanek do wyświetlenia
+        opacity (MappingProxyType): {tkanka: float} - przezroczystość każdej tkanki (0.0-1.0)
+        indices (MappingProxyType): {tkanka: int} - indeks koloru w LUT dla każdej tkanki
+        orientation (MappingProxyType): {tkanka: str} - orientacja danych
+        colors (MappingProxyType): {tkanka: str} - nazwa koloru (vtkNamedColors)
+    """
+    vtk_files: MappingProxyType
+    tissue_index: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    names: tuple = ()
+    opacity: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    indices: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    orientation: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+    colors: MappingProxyType = field(default_factory=lambda: MappingProxyType({}))
+
+
+def _read_only(value):
+    """
+    Zwraca kontener z JSON w wersji tylko do odczytu (dict -> MappingProxyType, list -> tuple).
+    
+    Słownik jest opakowany w widok bez kopiowania - oryginał nie wychodzi poza
+    _parse_json_cached(), więc nikt nie może go zmienić pod widokiem.
+    """
+    if isinstance(value, dict):
+        return MappingProxyType(value)
+    if isinstance(value, list):
+        return tuple(value)
+    return value
+
+
+# Nazwy pól AtlasParams - inne klucze z sekcji JSON są pomijane
+_ATLAS_PARAM_FIELDS = frozenset(f.name for f in fields(AtlasParams))
+
+
+def parse_json(fn_path, validate=False):
     """
     Parsuje plik JSON z konfiguracją atlasu anatomicznego.
     
-    Ta funkcja wczytuje plik JSON, waliduje jego zawartość i zwraca słownik
-    z parametrami gotowymi do użycia w aplikacji. Sprawdza czy wszystkie
-    wymagane pliki VTK istnieją na dysku.
+    Ta funkcja wczytuje plik JSON, waliduje jego zawartość i zwraca obiekt
+    AtlasParams z parametrami gotowymi do użycia w aplikacji. Istnienie plików VTK jest
+    domyślnie sprawdzane dopiero w resolve_vtk_file(), dla tkanek które są
+    faktycznie wczytywane - z validate=True wszystkie pliki są sprawdzane od razu.
     
     STRUKTURA WYNIKU:
-    Zwracany słownik zawiera:
-    - 'vtk_files': {stem: Path} - mapowanie nazw plików na pełne ścieżki
-    - 'names': [str] - lista nazw tkanek do wyświetlenia
-    - 'opacity': {tkanka: float} - przezroczystość każdej tkanki (0.0-1.0)
-    - 'indices': {tkanka: int} - indeks koloru w LUT dla każdej tkanki
-    - 'orientation': {tkanka: str} - orientacja danych
+    Zwracany obiekt AtlasParams ma atrybuty (słowniki jako MappingProxyType,
+    listy jako krotki - tylko do odczytu):
+    - vtk_files: {stem: Path} - mapowanie nazw plików na pełne ścieżki
+    - tissue_index: {tkanka: Path} - gotowe dopasowania z build_tissue_index()
+    - names: (str, ...) - nazwy tkanek do wyświetlenia
+    - opacity: {tkanka: float} - przezroczystość każdej tkanki (0.0-1.0)
+    - indices: {tkanka: int} - indeks koloru w LUT dla każdej tkanki
+    - orientation: {tkanka: str} - orientacja danych
+    - colors: {tkanka: str} - nazwa koloru
     
     Argumenty:
         fn_path (Path): Ścieżka do pliku JSON z konfiguracją
+        validate (bool): Czy sprawdzić od razu istnienie wszystkich plików VTK
+            (domyślnie False - sprawdzenie przy resolve_vtk_file())
     
     Returns:
-        tuple: (success: bool, parameters: dict)
+        tuple: (success: bool, parameters: AtlasParams)
             - success: True jeśli parsowanie powiodło się
-            - parameters: Słownik z parametrami lub None w przypadku błędu
+            - parameters: Parametry atlasu (tylko do odczytu) lub None w przypadku błędu
+
+    CACHE:
+    Wynik jest zapamiętywany dla pary (ścieżka, czas modyfikacji pliku JSON).
+    Kolejne wywołania dla niezmienionego pliku kosztują jeden stat() - bez
+    ponownego parsowania i sprawdzania plików VTK. Zmiana pliku na dysku
+    (nowy st_mtime_ns) automatycznie unieważnia wpis. Zwracany obiekt jest
+    współdzielony między wywołaniami, dlatego jest w całości tylko do odczytu
+    (frozen dataclass z krotkami i widokami MappingProxyType zamiast list i dict).
     
     Raises:
-        FileNotFoundError: Jeśli plik JSON, katalog root lub pliki VTK nie istnieją
+        FileNotFoundError: Jeśli plik JSON lub katalog root nie istnieją
+            (albo pliki VTK, gdy validate=True)
         ValueError: Jeśli brak plików VTK w konfiguracji
         json.JSONDecodeError: Jeśli plik JSON jest niepoprawny
     
     Przykład:
         >>> ok, params = parse_json(Path("liver_config.json"))
         >>> if ok:
-        >>>     print(f"Znaleziono {len(params['names'])} tkanek")
-        >>>     for tissue in params['names']:
-        >>>         print(f"- {tissue}: opacity={params['opacity'][tissue]}")
+        >>>     print(f"Znaleziono {len(params.names)} tkanek")
+        >>>     for tissue in params.names:
+        >>>         print(f"- {tissue}: opacity={params.opacity[tissue]}")
     """
     
+    # Czas modyfikacji jest częścią klucza cache - edycja pliku wymusza ponowne parsowanie
+    mtime_ns = os.stat(fn_path).st_mtime_ns
+    return True, _parse_json_cached(os.path.abspath(fn_path), mtime_ns, validate)
+
+
+@lru_cache(maxsize=8)
+def _parse_json_cached(fn_path, mtime_ns, validate):
+    """
+    Właściwe parsowanie pliku JSON - opis wyniku i wyjątków w parse_json().
+
+    mtime_ns nie jest używany w ciele funkcji, służy tylko jako część klucza
+    lru_cache. Wyjątki nie są zapamiętywane, więc poprawiony plik zostanie
+    wczytany przy następnym wywołaniu.
+    """
+
     # 1: Wczytaj plik JSON 
     
-    # Otwórz plik i sparsuj JSON do słownika Pythona
-    # 'with' zapewnia że plik zostanie zamknięty nawet jeśli wystąpi błąd
-    with open(fn_path) as f:
-        data = json.load(f)
+    # Wczytaj cały plik jako bytes i sparsuj JSON do słownika Pythona
+    # (orjson jeśli jest dostępny, w przeciwnym razie json z biblioteki standardowej)
+    data = _json_loads(Path(fn_path).read_bytes())
     
     # 2: Przygotuj pusty słownik na parametry 
     
@@ -85,62 +203,136 @@ def parse_json(fn_path):
     
     # Katalog root zawiera wszystkie pliki VTK
     # Ścieżki w JSON są relatywne względem tego katalogu
-    root = Path(data['files']['root'])
+    root_str = data['files']['root']
+    root = Path(root_str)
     
-    # Sprawdź czy katalog istnieje
-    if not root.exists():
+    # Sprawdź czy katalog istnieje (os.path.isdir na stringu - bez pośredniego Path)
+    if not os.path.isdir(root_str):
         raise FileNotFoundError(f"Katalog root nie istnieje: {root}")
     
-    # 4: Wczytaj i waliduj pliki VTK 
+    # 4: Wczytaj (i opcjonalnie waliduj) pliki VTK 
     
     # vtk_map będzie słownikiem: {stem: pełna_ścieżka}
     # gdzie stem to nazwa pliku bez rozszerzenia (np. "Liver_mesh")
     vtk_map = {}
+    vtk_files = data['files']['vtk_files']
+    
+    # Domyślnie nie sprawdzamy tu plików - aplikacja często wczytuje tylko część
+    # z nich, a brakujący plik i tak zgłosi resolve_vtk_file()
+    if validate:
+        _check_vtk_files(root, vtk_files)
     
     # Iteruj po wszystkich plikach VTK wymienionych w JSON
-    for f in data['files']['vtk_files']:
-        # Połącz root + relatywna ścieżka = pełna ścieżka
-        p = root / f
-        
-        # Sprawdź czy plik naprawdę istnieje
-        if not p.is_file():
-            raise FileNotFoundError(f"Plik VTK nie istnieje: {p}")
+    for f in vtk_files:
+        # Nazwa pliku bez rozszerzenia i bez katalogu (to samo co Path.stem),
+        # liczona na stringu - Path tworzymy tylko raz, dla wartości w mapie
+        # Przykład: "meshes/Liver_mesh.vtk" -> "Liver_mesh"
+        stem = os.path.splitext(os.path.basename(f))[0]
         
-        # Dodaj do mapy: nazwa_bez_rozszerzenia -> Path
-        # p.stem to nazwa pliku bez rozszerzenia i bez katalogu
-        # Przykład: "/data/meshes/Liver_mesh.vtk" -> "Liver_mesh"
-        vtk_map[p.stem] = p
+        # Dodaj do mapy: nazwa_bez_rozszerzenia -> Path (root + relatywna ścieżka)
+        vtk_map[stem] = root / f
     
     # Zapisz mapę plików w parameters
     parameters['vtk_files'] = vtk_map
     
+    # Indeks {tkanka: Path} liczony raz - resolve_vtk_file nie musi potem
+    # przeszukiwać wszystkich nazw plików dla każdej tkanki
+    parameters['tissue_index'] = build_tissue_index(vtk_map)
+    
     # 5: Wczytaj parametry tkanek 
     
     # JSON może mieć sekcje 'tissues' i 'figures' z różnymi parametrami
-    # Przechodzimy przez obie sekcje i łączymy dane
-    for section in ['tissues', 'figures']:
-        # Pobierz sekcję (lub pusty dict jeśli nie istnieje)
-        section_data = data.get(section, {})
-        
-        # Dla każdego parametru w sekcji (np. 'names', 'opacity', 'indices')
-        for k, v in section_data.items():
-            # Zapisz bezpośrednio do parameters
-            # Jeśli ten sam klucz występuje w obu sekcjach, drugi nadpisuje pierwszy
-            parameters[k] = v
+    # (np. 'names', 'opacity', 'indices') - kopiujemy je bezpośrednio do parameters.
+    # dict.update robi to w C, bez pętli po parach w Pythonie.
+    # Jeśli ten sam klucz występuje w obu sekcjach, drugi nadpisuje pierwszy
+    # Brakująca sekcja (lub null w JSON) jest pomijana
+    for section in ('tissues', 'figures'):
+        section_data = data.get(section)
+        if section_data:
+            parameters.update(section_data)
     
     # 6: Walidacja - sprawdź czy są jakieś pliki VTK 
     
-    if len(parameters['vtk_files']) == 0:
+    if len(vtk_map) == 0:
         raise ValueError('Brak plików VTK w konfiguracji - oczekiwano przynajmniej jednego')
     
     # 7: Zwróć wynik 
     
-    # Zwracamy tuple: (True, parameters) oznacza sukces
+    # Zebrane parametry przepisujemy do AtlasParams (tylko znane pola), jako
+    # kontenery tylko do odczytu - wynik jest współdzielony przez cache
     # W przypadku błędu funkcja rzuci wyjątek przed dotarciem tutaj
-    return True, parameters
+    return AtlasParams(**{k: _read_only(v) for k, v in parameters.items()
+                          if k in _ATLAS_PARAM_FIELDS})
+
+
+def _check_vtk_files(root, vtk_files):
+    """
+    Sprawdza czy wszystkie pliki VTK z konfiguracji istnieją (parse_json z validate=True).
+
+    Raises:
+        FileNotFoundError: Dla pierwszego brakującego pliku (w kolejności z JSON)
+    """
+    
+    # Jedno przejście os.scandir zamiast osobnego stat() dla każdego pliku VTK.
+    # Typ wpisu (d_type) przychodzi razem z listą katalogu, więc is_file()
+    # zwykle nie wymaga dodatkowego wywołania systemowego.
+    with os.scandir(root) as it:
+        present = {e.name for e in it if e.is_file()}
+    
+    # Ścieżki z podkatalogami (np. "meshes/Liver.vtk") nie trafią do zbioru
+    # present - dla nich zostaje zwykłe sprawdzenie is_file(). Na dyskach
+    # sieciowych każde takie sprawdzenie czeka na odpowiedź serwera, więc
+    # gdy jest ich kilka, wykonujemy je równolegle w puli wątków
+    # (operacja I/O - GIL jest zwalniany na czas stat()).
+    unlisted = [f for f in vtk_files if f not in present]
+    if len(unlisted) > 1:
+        with ThreadPoolExecutor(max_workers=min(32, len(unlisted))) as executor:
+            unlisted_ok = dict(zip(unlisted, executor.map(lambda f: (root / f).is_file(), unlisted)))
+    else:
+        unlisted_ok = {f: (root / f).is_file() for f in unlisted}
+    
+    for f in vtk_files:
+        if f not in present and not unlisted_ok[f]:
+            raise FileNotFoundError(f"Plik VTK nie istnieje: {root / f}")
 
 
-def resolve_vtk_file(tissue, vtk_map):
+def build_tissue_index(vtk_map):
+    """
+    Buduje indeks {tkanka: Path} dla wszystkich tkanek z TISSUE_TO_STEM.
+
+    Dopasowanie jest takie samo jak w resolve_vtk_file(): dla każdej tkanki
+    wybierany jest pierwszy plik (w kolejności vtk_map), którego stem zawiera
+    token tkanki. Przeszukiwanie odbywa się tylko raz, więc późniejsze
+    wywołania resolve_vtk_file() z indeksem to pojedyncze odczyty ze słownika
+    zamiast skanowania wszystkich nazw plików dla każdej tkanki.
+
+    Argumenty:
+        vtk_map (dict): Słownik {stem: Path} z plików VTK
+
+    Returns:
+        dict: {tkanka (lowercase): Path} - tylko tkanki, dla których znaleziono plik
+    """
+    index = {}
+    
+    # Z automatem: każdy stem przechodzimy raz, w kolejności vtk_map.
+    # iter() zwraca także nakładające się dopasowania (np. "LiverSegment_I"
+    # wewnątrz "LiverSegment_II"), a setdefault zostawia pierwszy pasujący plik.
+    if _TOKEN_AUTOMATON is not None:
+        for stem, path in vtk_map.items():
+            for _, tissues in _TOKEN_AUTOMATON.iter(stem):
+                for tissue in tissues:
+                    index.setdefault(tissue, path)
+        return index
+    
+    for tissue, token in TISSUE_TO_STEM.items():
+        for stem, path in vtk_map.items():
+            if token in stem:
+                index[tissue] = path
+                break
+    return index
+
+
+def resolve_vtk_file(tissue, vtk_map, tissue_index=None):
     """
     Znajduje plik VTK dla danej nazwy tkanki.
     
@@ -152,13 +344,16 @@ def resolve_vtk_file(tissue, vtk_map):
     1. Zamień nazwę tkanki na lowercase (unifikacja)
     2. Znajdź wzorzec nazwy (stem) w TISSUE_TO_STEM
     3. Przeszukaj vtk_map szukając pliku zawierającego ten stem
-    4. Zwróć pełną ścieżkę do pliku
+    4. Sprawdź czy plik istnieje i zwróć pełną ścieżkę do pliku
     
     Argumenty:
         tissue (str): Nazwa tkanki (np. "liver", "left_kidney", "ivc")
             Może być w dowolnym case - funkcja zamienia na lowercase
         vtk_map (dict): Słownik {stem: Path} z plików VTK
             Zwykle pochodzi z parse_json()
+        tissue_index (dict, optional): Indeks z build_tissue_index()
+            (params.tissue_index). Jeśli podany, krok 3 to jeden
+            odczyt ze słownika zamiast przeszukiwania vtk_map
     
     Returns:
         Path: Pełna ścieżka do pliku VTK dla tej tkanki
@@ -167,6 +362,7 @@ def resolve_vtk_file(tissue, vtk_map):
         KeyError: Jeśli:
             - Nazwa tkanki nie jest w TISSUE_TO_STEM (nieznana tkanka)
             - Nie znaleziono pliku VTK zawierającego odpowiedni stem
+        FileNotFoundError: Jeśli pasujący plik VTK nie istnieje na dysku
     
     DLACZEGO TO JEST POTRZEBNE?
     W kodzie wygodnie jest używać prostych nazw jak "liver" czy "kidney".
@@ -185,29 +381,46 @@ def resolve_vtk_file(tissue, vtk_map):
     
     # 2: Znajdź token (wzorzec) dla tej tkanki 
     
+    # Pobierz token (wzorzec nazwy) z mapowania - jedno wyszukiwanie w słowniku
+    # zamiast sprawdzenia "in" i osobnego odczytu
+    # Przykład: "liver_segment_i" -> "LiverSegment_I"
+    token = TISSUE_TO_STEM.get(key)
+    
     # Sprawdź czy ta tkanka jest w naszym mapowaniu
-    if key not in TISSUE_TO_STEM:
+    if token is None:
         # Jeśli nie ma w mapowaniu, rzuć błąd z pomocną wiadomością
         raise KeyError(
             f'Nie znaleziono aliasu dla tkanki "{tissue}". '
-            f'Dostępne tkanki: {", ".join(TISSUE_TO_STEM.keys())}'
+            f'Dostępne tkanki: {_TISSUE_KEYS_MSG}'
         )
     
-    # Pobierz token (wzorzec nazwy) z mapowania
-    # Przykład: "liver_segment_i" -> "LiverSegment_I"
-    token = TISSUE_TO_STEM[key]
-    
     # 3: Przeszukaj pliki VTK szukając tego tokenu 
     
-    # Iteruj po wszystkich plikach VTK w mapie
-    for stem, path in vtk_map.items():
-        # Sprawdź czy token występuje w nazwie pliku (stem)
-        # Przykład: czy "LiverSegment_I" występuje w "Liver_Segment_I_Final"?
-        if token in stem:
-            # Znaleziono! Zwróć pełną ścieżkę do tego pliku
-            return path
-    
-    # 4: Nie znaleziono pliku - rzuć błąd 
+    # Z gotowym indeksem wynik jest już policzony - brak wpisu oznacza
+    # że żaden plik nie pasuje
+    path = None
+    if tissue_index is not None:
+        path = tissue_index.get(key)
+    else:
+        # Iteruj po wszystkich plikach VTK w mapie
+        for stem, candidate in vtk_map.items():
+            # Sprawdź czy token występuje w nazwie pliku (stem)
+            # Przykład: czy "LiverSegment_I" występuje w "Liver_Segment_I_Final"?
+            if token in stem:
+                # Znaleziono! Pierwszy pasujący plik wygrywa
+                path = candidate
+                break
+    
+    # 4: Sprawdź czy znaleziony plik istnieje 
+    
+    # parse_json() domyślnie nie sprawdza plików VTK, więc robimy to tutaj -
+    # tylko dla tkanek które są faktycznie wczytywane
+    if path is not None:
+        if not path.is_file():
+            raise FileNotFoundError(f"Plik VTK nie istnieje: {path}")
+        return path
+    
+    # 5: Nie znaleziono pliku - rzuć błąd 
     
     # Jeśli dotarliśmy tutaj, oznacza to że:
     # - Tkanka jest w TISSUE_TO_STEM (ma zdefiniowany alias)
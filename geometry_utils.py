@@ -12,9 +12,24 @@ Implementacja wyznaczania danych 3d z segmentacji zwracała mi ponad 40 brył, p
 że bryły te w większości były niemal zupełnie identyczne. Uznałem że najprostszym rozwiązaniem będzie
 jesli przeprowadze wykrycie duplikatów i nie będę ich wyświetlał 
 
+WYDAJNOŚĆ:
+Porównanie sygnatur to kilkanaście operacji na liczbach, wykonywane tylko dla
+par o zbliżonej liczbie punktów (zob. compute_segmentation_polydata). Czas
+wykrywania duplikatów to ułamek czasu contouringu i wygładzania w VTK, dlatego
+funkcje zostają w czystym Pythonie - kompilacja JIT (np. Numba) dołożyłaby
+zależność od numpy/numba bez zauważalnego zysku.
+
 """
 
-import math
+from vtkmodules.vtkFiltersCore import vtkMassProperties
+
+
+# Minimalne podobieństwo położenia (1 - odległość_centrów / średni_rozmiar)
+# wymagane w are_polydata_similar(). Próg jest stały, więc warunek
+# 1 - d / rozmiar >= 0.95 przekształcamy raz do postaci d <= 0.05 * rozmiar -
+# bez dzielenia, max() i pierwiastka dla każdej pary.
+CENTER_SIMILARITY_THRESHOLD = 0.95
+_MAX_RELATIVE_CENTER_DIST = 1.0 - CENTER_SIMILARITY_THRESHOLD
 
 
 def calculate_polydata_signature(polydata):
@@ -24,7 +39,7 @@ def calculate_polydata_signature(polydata):
     Sygnatura to słownik zawierający kluczowe cechy obiektu 3D:
     - Liczba punktów (wierzchołków siatki)
     - Liczba komórek (trójkątów/wielokątów)
-    - Objętość (przybliżona przez bounding box)
+    - Objętość (rzeczywista objętość zamkniętej siatki, z vtkMassProperties)
     - Granice przestrzenne (min/max w każdej osi)
     
     Ta "sygnatura" pozwala szybko sprawdzić czy dwa obiekty są podobne bez szczegółowego porównywania geometrii.
@@ -36,8 +51,10 @@ def calculate_polydata_signature(polydata):
         dict: Słownik z metrykami:
             - 'num_points': liczba wierzchołków (int)
             - 'num_cells': liczba komórek/trójkątów (int)
-            - 'volume': przybliżona objętość (float)
+            - 'volume': objętość siatki (float)
             - 'bounds': tuple z 6 wartości (xmin, xmax, ymin, ymax, zmin, zmax)
+            - 'center': tuple (x, y, z) - środek bounding box'a
+            - 'extent_sum': suma wymiarów bounding box'a (szerokość + głębokość + wysokość)
     
     Przykład:
         >>> sig = calculate_polydata_signature(liver_polydata)
@@ -59,24 +76,43 @@ def calculate_polydata_signature(polydata):
     # (x_min, x_max, y_min, y_max, z_min, z_max)
     bounds = polydata.GetBounds()
     
-    # 3: Oblicz przybliżoną objętość 
-    
-    # Obliczamy objętość bounding box'a jako przybliżenie objętości obiektu
-    # To NIE jest dokładna objętość siatki, ale wystarcza do porównań
-    #
-    # Wymiary prostopadłościanu:
-    # - szerokość (X): bounds[1] - bounds[0]
-    # - głębokość (Y): bounds[3] - bounds[2]
-    # - wysokość (Z): bounds[5] - bounds[4]
-    volume = (bounds[1] - bounds[0]) * (bounds[3] - bounds[2]) * (bounds[5] - bounds[4])
-    
-    # 4: Zwróć wszystkie metryki jako słownik 
+    # 3: Oblicz objętość siatki 
+    
+    # vtkMassProperties liczy objętość bryły ograniczonej trójkątami
+    # (twierdzenie o dywergencji) w C++, w jednym przejściu po komórkach.
+    # W przeciwieństwie do objętości bounding box'a odróżnia obiekty o tym
+    # samym prostopadłościanie otaczającym, ale innym kształcie.
+    # Siatki z vtkSurfaceNets3D i vtkFlyingEdges3D składają się z trójkątów, więc warunek
+    # vtkMassProperties jest spełniony.
+    mass_properties = vtkMassProperties()
+    mass_properties.SetInputData(polydata)
+    volume = mass_properties.GetVolume()
+    
+    # 4: Policz wielkości używane przy porównaniach 
+    
+    # Sygnatura jest liczona raz na obiekt, a porównywana z wieloma innymi.
+    # Środek i suma wymiarów bounding box'a liczymy więc tutaj, a nie
+    # w are_polydata_similar() dla każdej pary od nowa.
+    center = (
+        (bounds[0] + bounds[1]) / 2,  # x_środek = (x_min + x_max) / 2
+        (bounds[2] + bounds[3]) / 2,  # y_środek = (y_min + y_max) / 2
+        (bounds[4] + bounds[5]) / 2   # z_środek = (z_min + z_max) / 2
+    )
+    extent_sum = (
+        abs(bounds[1] - bounds[0]) +  # szerokość
+        abs(bounds[3] - bounds[2]) +  # głębokość
+        abs(bounds[5] - bounds[4])    # wysokość
+    )
+    
+    # 5: Zwróć wszystkie metryki jako słownik 
     
     return {
         'num_points': num_points,  # Rozdzielczość siatki
         'num_cells': num_cells,    # Liczba wielokątów
         'volume': volume,          # Rozmiar obiektu
-        'bounds': bounds           # Położenie w przestrzeni
+        'bounds': bounds,          # Położenie w przestrzeni
+        'center': center,          # Środek bounding box'a
+        'extent_sum': extent_sum   # Suma wymiarów bounding box'a
     }
 
 
@@ -89,7 +125,8 @@ def are_polydata_similar(sig1, sig2, threshold=0.90):
     
     ALGORYTM PORÓWNANIA:
     1. Sprawdź czy żadna metryka nie jest zerowa (obiekty puste -> nie podobne)
-    2. Oblicz stosunek dla każdej metryki (mniejsza/większa)
+    2. Oblicz stosunek dla każdej metryki (mniejsza/większa) - pierwszy
+       stosunek poniżej progu kończy porównanie
     3. Oblicz podobieństwo położenia (centra muszą być blisko siebie)
     4. Wszystkie metryki muszą być powyżej progu żeby uznać obiekty za podobne
     
@@ -126,67 +163,51 @@ def are_polydata_similar(sig1, sig2, threshold=0.90):
     if sig1['volume'] == 0 or sig2['volume'] == 0:
         return False
     
-    # 2: Oblicz stosunek podobieństwa dla każdej metryki 
+    # 2: Porównaj metryki po kolei, od najtańszej 
+    
+    # Większość par to różne obiekty, więc zwykle już pierwszy stosunek
+    # wypada poniżej progu. Wychodzimy wtedy od razu, bez liczenia
+    # kolejnych stosunków i (najdroższej) odległości między centrami.
     
     # Stosunek punktów: zawsze dzielimy mniejszą przez większą
     # Wynik będzie w zakresie (0, 1], gdzie 1.0 = identyczna liczba punktów
     points_ratio = min(sig1['num_points'], sig2['num_points']) / max(sig1['num_points'], sig2['num_points'])
+    if points_ratio < threshold:
+        return False
     
     # Analogicznie dla komórek
     cells_ratio = min(sig1['num_cells'], sig2['num_cells']) / max(sig1['num_cells'], sig2['num_cells'])
+    if cells_ratio < threshold:
+        return False
     
     # I dla objętości
     volume_ratio = min(sig1['volume'], sig2['volume']) / max(sig1['volume'], sig2['volume'])
+    if volume_ratio < threshold:
+        return False
     
     # 3: Porównaj położenie przestrzenne (centra obiektów) 
     
-    bounds1 = sig1['bounds']
-    bounds2 = sig2['bounds']
-    
-    # Oblicz środek bounding box'a dla każdego obiektu
-    # Centrum to punkt (x_śr, y_śr, z_śr) w środku prostopadłościanu
-    center1 = [
-        (bounds1[0] + bounds1[1]) / 2,  # x_środek = (x_min + x_max) / 2
-        (bounds1[2] + bounds1[3]) / 2,  # y_środek = (y_min + y_max) / 2
-        (bounds1[4] + bounds1[5]) / 2   # z_środek = (z_min + z_max) / 2
-    ]
-    
-    center2 = [
-        (bounds2[0] + bounds2[1]) / 2,
-        (bounds2[2] + bounds2[3]) / 2,
-        (bounds2[4] + bounds2[5]) / 2
-    ]
-    
-    # Oblicz odległość euklidesową między centrami
-    # Wzór: sqrt((x1-x2)² + (y1-y2)² + (z1-z2)²)
-    # zip(center1, center2) daje pary [(x1,x2), (y1,y2), (z1,z2)]
-    center_dist = math.sqrt(sum((c1 - c2)**2 for c1, c2 in zip(center1, center2)))
+    # Środki bounding box'ów są już policzone w sygnaturach
+    center1 = sig1['center']
+    center2 = sig2['center']
     
     # Oblicz średni rozmiar obiektów (żeby znormalizować odległość)
-    # Bierzemy średnią z szerokości, głębokości i wysokości obu obiektów
-    avg_size = (
-        abs(bounds1[1] - bounds1[0]) +  # szerokość obiektu 1
-        abs(bounds1[3] - bounds1[2]) +  # głębokość obiektu 1
-        abs(bounds1[5] - bounds1[4]) +  # wysokość obiektu 1
-        abs(bounds2[1] - bounds2[0]) +  # szerokość obiektu 2
-        abs(bounds2[3] - bounds2[2]) +  # głębokość obiektu 2
-        abs(bounds2[5] - bounds2[4])    # wysokość obiektu 2
-    ) / 6.0  # Dzielimy przez 6 bo mamy 6 wymiarów
-    
-    # Oblicz podobieństwo położenia (1.0 = idealne, 0.0 = bardzo daleko)
+    # Średnia z szerokości, głębokości i wysokości obu obiektów - 6 wymiarów
+    avg_size = (sig1['extent_sum'] + sig2['extent_sum']) / 6.0
+    
     # Jeśli avg_size == 0, obiekty są punktowe więc uznajemy za podobne
     if avg_size == 0:
-        center_similarity = 1.0
-    else:
-        # Im mniejsza odległość względem rozmiaru, tym większe podobieństwo
-        center_similarity = max(0, 1.0 - (center_dist / avg_size))
-    
-    # 4: Sprawdź czy wszystkie metryki są powyżej progu 
-    if (points_ratio >= threshold and 
-        cells_ratio >= threshold and 
-        volume_ratio >= threshold and
-        center_similarity >= 0.95):
         return True
     
-    # Jeśli którakolwiek metryka jest poniżej progu, obiekty NIE są podobne
-    return False
+    # 4: Stosunki przeszły próg - o wyniku decyduje położenie 
+    
+    # Podobieństwo położenia 1 - (odległość / avg_size) musi wynosić co najmniej
+    # CENTER_SIMILARITY_THRESHOLD, czyli odległość między centrami nie może
+    # przekroczyć _MAX_RELATIVE_CENTER_DIST * avg_size. Porównujemy kwadraty
+    # (odległość euklidesowa: sqrt((x1-x2)² + (y1-y2)² + (z1-z2)²)),
+    # więc pierwiastek nie jest potrzebny.
+    dx = center1[0] - center2[0]
+    dy = center1[1] - center2[1]
+    dz = center1[2] - center2[2]
+    max_dist = _MAX_RELATIVE_CENTER_DIST * avg_size
+    return dx * dx + dy * dy + dz * dz <= max_dist * max_dist
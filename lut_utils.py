@@ -11,7 +11,7 @@ Przykład:
 """
 
 import colorsys  # Biblioteka do konwersji między modelami kolorów (HSV <-> RGB)
-from vtkmodules.vtkCommonCore import vtkLookupTable
+from vtkmodules.vtkCommonCore import vtkLookupTable, vtkUnsignedCharArray
 
 
 def create_visible_all_lut():
@@ -24,10 +24,45 @@ def create_visible_all_lut():
     
     Wartość 0 (tło) jest zawsze przezroczysta - bez tego tło w widoku segmentacji 2d robi się niebieskie
     
+    Tablica nie zależy od żadnych danych wejściowych, więc jest liczona raz przy
+    imporcie modułu (_VISIBLE_ALL_LUT). Funkcja zwraca jej kopię (DeepCopy),
+    żeby wywołujący mógł ją modyfikować bez wpływu na inne widoki.
+    
     Returns:
         vtkLookupTable: Gotowa tabela kolorów z 256 wpisami (0-255)
         
     """
+    lut = vtkLookupTable()
+    lut.DeepCopy(_VISIBLE_ALL_LUT)
+    return lut
+
+
+def lut_rgb_table(lut):
+    """
+    Zwraca kolory RGB wszystkich wpisów lookup table jako krotkę krotek.
+    
+    Tablica jest odczytywana z VTK jednym kopiowaniem bufora (GetTable()), więc
+    pętla po tkankach może indeksować krotkę zamiast wywoływać
+    lut.GetTableValue(i) osobno dla każdej tkanki.
+    
+    Argumenty:
+        lut (vtkLookupTable): Zbudowana lookup table
+    
+    Returns:
+        tuple: ((R, G, B), ...) w zakresie 0.0-1.0, indeksowane wartością etykiety -
+            te same wartości co lut.GetTableValue(i)[:3]
+    """
+    rgba = bytes(memoryview(lut.GetTable()).cast('B'))
+    return tuple(
+        (rgba[i] / 255.0, rgba[i + 1] / 255.0, rgba[i + 2] / 255.0)
+        for i in range(0, len(rgba), 4)
+    )
+
+
+def _build_visible_all_lut():
+    """
+    Buduje tablicę dla create_visible_all_lut() - wywoływana raz, przy imporcie modułu.
+    """
     
     # Tworzymy nową pustą lookup table
     lut = vtkLookupTable()
@@ -43,11 +78,14 @@ def create_visible_all_lut():
     # Od 0 (tło) do 255 (maksymalna etykieta)
     lut.SetRange(0, MAX_LABELS - 1)
     
+    # Kolory liczymy w Pythonie do bufora bajtów (RGBA, 0-255, 4 bajty na wpis),
+    # a do VTK przekazujemy całą tablicę naraz przez SetTable(). Zamiast 256
+    # wywołań SetTableValue (każde to przejście Python -> C++) jest jedno kopiowanie.
+    rgba = bytearray(4 * MAX_LABELS)
+    
     # SPECJALNY PRZYPADEK: Wartość 0 to zawsze tło
-    # Ustawiamy jako całkowicie przezroczyste (RGBA = 0, 0, 0, 0)
-    # Parametry SetTableValue: (index, R, G, B, Alpha)
-    # gdzie R, G, B, Alpha są w zakresie 0.0 - 1.0
-    lut.SetTableValue(0, 0, 0, 0, 0)
+    # Zostaje jako całkowicie przezroczyste (RGBA = 0, 0, 0, 0) -
+    # bytearray jest już wypełniony zerami
     
     # Generujemy kolory dla wartości 1-255
     for i in range(1, MAX_LABELS):
@@ -73,14 +111,32 @@ def create_visible_all_lut():
         # ale VTK potrzebuje RGB, więc konwertujemy
         r, g, b = colorsys.hsv_to_rgb(hue, saturation, value)
         
-        # 5: Zapisz kolor do LUT 
-        # Parametry: (indeks, czerwony, zielony, niebieski, przezroczystość)
+        # 5: Zapisz kolor do bufora 
+        # Zaokrąglenie jak w vtkLookupTable::SetTableValue: int(x * 255 + 0.5)
         # Alpha = 0.8 oznacza 80% nieprzezroczystości (lekko przezroczyste)
         # Dzięki temu możemy widzieć nakładające się struktury
-        lut.SetTableValue(i, r, g, b, 0.8)
+        rgba[4 * i:4 * i + 4] = (
+            int(r * 255.0 + 0.5),
+            int(g * 255.0 + 0.5),
+            int(b * 255.0 + 0.5),
+            int(0.8 * 255.0 + 0.5),
+        )
+    
+    # 6: Przekaż całą tablicę do VTK 
+    # vtkUnsignedCharArray udostępnia swoją pamięć przez protokół bufora,
+    # więc bajty kopiujemy jednym przypisaniem do memoryview
+    table = vtkUnsignedCharArray()
+    table.SetNumberOfComponents(4)
+    table.SetNumberOfTuples(MAX_LABELS)
+    memoryview(table).cast('B')[:] = rgba
+    lut.SetTable(table)
     
     # Finalizujemy tablicę - VTK musi to zrobić przed użyciem
     lut.Build()
     
     # Zwracamy gotową lookup table
     return lut
+
+
+# Tablica liczona raz przy imporcie - create_visible_all_lut() zwraca jej kopie
+_VISIBLE_ALL_LUT = _build_visible_all_lut()
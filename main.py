@@ -27,49 +27,51 @@ SKRÓTY KLAWISZOWE:
 - Mysz: Obracanie kamery (lewy), zoom (prawy), panning (środkowy)
 
 WYMAGANIA SYSTEMOWE:
-- Python 3.7+
+- Python 3.10+ (dataclass(slots=True) w file_utils.AtlasParams i slider_widgets.SliderProperties)
 - VTK 9.0+
+- Opcjonalnie: pyahocorasick (pip install pyahocorasick) - szybsze dopasowanie
+  nazw plików VTK do tkanek; bez niego file_utils używa zwykłego przeszukiwania
 - Pliki danych: JSON, NRRD, VTK (ścieżki ustawia się w config.py)
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
-# IMPORTY VTK (biblioteka wizualizacji 3D)
-import vtkmodules.vtkInteractionStyle
-import vtkmodules.vtkRenderingOpenGL2
-from vtkmodules.vtkCommonColor import vtkNamedColors
-from vtkmodules.vtkCommonCore import vtkCommand
-from vtkmodules.vtkFiltersCore import vtkPolyDataNormals
-from vtkmodules.vtkFiltersGeneral import vtkTransformPolyDataFilter
-from vtkmodules.vtkIOImage import vtkNrrdReader
-from vtkmodules.vtkIOLegacy import vtkPolyDataReader
-from vtkmodules.vtkInteractionStyle import vtkInteractorStyleTrackballCamera
-from vtkmodules.vtkInteractionWidgets import (
-    vtkCameraOrientationWidget,
-    vtkOrientationMarkerWidget
-)
-from vtkmodules.vtkRenderingCore import (
-    vtkActor,
-    vtkPolyDataMapper,
-    vtkRenderWindow,
-    vtkRenderWindowInteractor,
-    vtkRenderer
-)
-
 #  IMPORT Z MOICH MODUŁÓW 
+# Tylko lekkie moduły (bez VTK) - konfiguracja i parsowanie JSON.
+# VTK i moduły z niego korzystające importujemy dopiero w main(), po
+# wczytaniu konfiguracji: rejestracja fabryk VTK trwa, a przy błędnym
+# pliku JSON nie jest w ogóle potrzebna.
 from config import (
     NRRD_FILE_PATH, NRRD_LABELS_PATH, JSON_PATH,
     top_y, step_y, right_x0_col1, right_x1_col1, right_x0_col2, right_x1_col2
 )
-from lut_utils import create_visible_all_lut
-from slice_utils import create_slice_plane
-from slider_widgets import SliderProperties, make_slider_widget, make_slice_slider
-from callbacks import SliderCallback, SlicePlaneCallback, SliderToggleCallback
-from transforms import SliceOrder
-from orientation_widgets import make_cube_actor
 from file_utils import parse_json, resolve_vtk_file
 
 
+def _read_polydata(vtk_path):
+    """
+    Wczytuje jeden plik VTK z geometrią (uruchamiane w wątku roboczym).
+    
+    Każde wywołanie ma własny reader, więc wątki nie dzielą obiektów VTK.
+    Zwracamy sam dataset - reader nie jest dalej potrzebny (mesh'e się nie
+    zmieniają), więc nie trzymamy go w pipeline.
+    
+    Argumenty:
+        vtk_path (Path): Ścieżka do pliku .vtk
+    
+    Returns:
+        vtkPolyData: Wczytana geometria
+    """
+    from vtkmodules.vtkIOLegacy import vtkPolyDataReader
+    
+    reader = vtkPolyDataReader()
+    reader.SetFileName(str(vtk_path))
+    reader.Update()
+    return reader.GetOutput()
+
+
 def main():
     """
     Główna funkcja aplikacji - inicjalizuje wszystko i uruchamia pętlę zdarzeń.
@@ -104,11 +106,46 @@ def main():
         return
     
     # Pobierz listę tkanek do wyświetlenia
-    tissues = params['names']
+    tissues = params.names
+    
+    # IMPORTY VTK (biblioteka wizualizacji 3D)
+    # Dopiero tutaj - konfiguracja jest poprawna, więc będziemy renderować
+    import vtkmodules.vtkInteractionStyle
+    import vtkmodules.vtkRenderingOpenGL2
+    from vtkmodules.vtkCommonColor import vtkNamedColors
+    from vtkmodules.vtkCommonCore import vtkCommand
+    from vtkmodules.vtkCommonTransforms import vtkTransform
+    from vtkmodules.vtkFiltersCore import vtkPolyDataNormals
+    from vtkmodules.vtkFiltersGeneral import vtkTransformPolyDataFilter
+    from vtkmodules.vtkIOImage import vtkNrrdReader
+    from vtkmodules.vtkInteractionStyle import vtkInteractorStyleTrackballCamera
+    from vtkmodules.vtkInteractionWidgets import (
+        vtkCameraOrientationWidget,
+        vtkOrientationMarkerWidget
+    )
+    from vtkmodules.vtkRenderingCore import (
+        vtkActor,
+        vtkPolyDataMapper,
+        vtkRenderWindow,
+        vtkRenderWindowInteractor,
+        vtkRenderer
+    )
+    
+    from lut_utils import create_visible_all_lut, lut_rgb_table
+    from slice_utils import create_slice_plane
+    from slider_widgets import SliderProperties, make_slider_widget, make_slice_slider
+    from callbacks import (
+        make_opacity_callback, make_interaction_pause_callbacks,
+        SlicePlaneCallback, SliderToggleCallback
+    )
+    from transforms import SLICE_ORDER
+    from orientation_widgets import make_cube_actor
     
     # 2: STWÓRZ LOOKUP TABLE (mapowanie wartości na kolory)
     # LUT przypisuje kolory do wartości liczbowych (etykiet segmentacji)
     lut = create_visible_all_lut()
+    # Kolory RGB z LUT odczytane raz - do kolorowania mesh'y tkanek
+    lut_rgb = lut_rgb_table(lut)
 
     
     # 3: STWÓRZ RENDERER (odpowiada za renderowanie sceny 3D)  
@@ -132,7 +169,7 @@ def main():
     sliders = {}                   # Suwaki kontrolujące opacity i pozycję slice'ów
     slice_actors_gray = {}         # Aktory z obrazami slice'ów (szare)
     slice_actors_labels = {}       # Aktory z etykietami na slice'ach (kolorowe)
-    slice_transforms = {}          # Transformacje przestrzenne dla slice'ów
+    slice_planes = {}              # Płaszczyzny przekroju (przesuwane przez suwaki)
     
     # Readery dla danych obrazowych
     nrrd_reader = None            # Reader dla obrazu CT/MRI
@@ -160,21 +197,21 @@ def main():
         # 7d: Stwórz trzy płaszczyzny przekroju (XY, XZ, YZ)
         
         # XY (aksjalna/pozioma)
-        gray_xy, labels_xy, _, _, _, transforms_xy = create_slice_plane(
+        gray_xy, labels_xy, plane_xy, _, _ = create_slice_plane(
             nrrd_reader, label_reader, 'XY', -50, lut)
         
         # XZ (koronalna/czołowa)
-        gray_xz, labels_xz, _, _, _, transforms_xz = create_slice_plane(
+        gray_xz, labels_xz, plane_xz, _, _ = create_slice_plane(
             nrrd_reader, label_reader, 'XZ', dims[1] // 2, lut)
         
         # YZ (sagitalna/boczna)
-        gray_yz, labels_yz, _, _, _, transforms_yz = create_slice_plane(
+        gray_yz, labels_yz, plane_yz, _, _ = create_slice_plane(
             nrrd_reader, label_reader, 'YZ', -dims[0] // 2, lut)
         
-        # Zapisz aktory i transformacje w słownikach (dla łatwego dostępu)
+        # Zapisz aktory i płaszczyzny w słownikach (dla łatwego dostępu)
         slice_actors_gray = {'XY': gray_xy, 'XZ': gray_xz, 'YZ': gray_yz}
         slice_actors_labels = {'XY': labels_xy, 'XZ': labels_xz, 'YZ': labels_yz}
-        slice_transforms = {'XY': transforms_xy, 'XZ': transforms_xz, 'YZ': transforms_yz}
+        slice_planes = {'XY': plane_xy, 'XZ': plane_xz, 'YZ': plane_yz}
         
         # 7e: Dodaj aktorów do sceny
         
@@ -194,37 +231,40 @@ def main():
         sp = SliderProperties()
         
         # Suwak Z (płaszczyzna XY)
-        sp.p1 = [0.25, 0.05]  # Początek suwaka (dolny środek ekranu)
-        sp.p2 = [0.40, 0.05]  # Koniec suwaka
-        sw_xy = make_slice_slider(sp, -dims[2], dims[2] // 2, -50, "Z Slice")
+        # Początek suwaka (dolny środek ekranu) i koniec suwaka
+        sw_xy = make_slice_slider(sp.at((0.25, 0.05), (0.40, 0.05)),
+                                  -dims[2], dims[2] // 2, -50, "Z Slice")
         sw_xy.SetInteractor(iren)
         sw_xy.EnabledOn()
         # Callback który będzie wywoływany gdy użytkownik przesuwa suwak
+        # (InteractionEvent) i gdy go puszcza (EndInteractionEvent) - okno
+        # odświeża sam widget suwaka
         callback_xy = SlicePlaneCallback(nrrd_reader, label_reader, 
-            slice_actors_gray['XY'], slice_actors_labels['XY'], 'XY', slice_transforms['XY'], lut)
+            slice_actors_gray['XY'], slice_actors_labels['XY'], 'XY', slice_planes['XY'])
         sw_xy.AddObserver(vtkCommand.InteractionEvent, callback_xy)
+        sw_xy.AddObserver(vtkCommand.EndInteractionEvent, callback_xy)
         sliders['Z Slice'] = sw_xy
         
         # Suwak Y (płaszczyzna XZ)
-        sp.p1 = [0.42, 0.05]
-        sp.p2 = [0.57, 0.05]
-        sw_xz = make_slice_slider(sp, 0, dims[1], dims[1] // 2, "Y Slice")
+        sw_xz = make_slice_slider(sp.at((0.42, 0.05), (0.57, 0.05)),
+                                  0, dims[1], dims[1] // 2, "Y Slice")
         sw_xz.SetInteractor(iren)
         sw_xz.EnabledOn()
         callback_xz = SlicePlaneCallback(nrrd_reader, label_reader, 
-            slice_actors_gray['XZ'], slice_actors_labels['XZ'], 'XZ', slice_transforms['XZ'], lut)
+            slice_actors_gray['XZ'], slice_actors_labels['XZ'], 'XZ', slice_planes['XZ'])
         sw_xz.AddObserver(vtkCommand.InteractionEvent, callback_xz)
+        sw_xz.AddObserver(vtkCommand.EndInteractionEvent, callback_xz)
         sliders['Y Slice'] = sw_xz
         
         # Suwak X (płaszczyzna YZ)
-        sp.p1 = [0.59, 0.05]
-        sp.p2 = [0.74, 0.05]
-        sw_yz = make_slice_slider(sp, -dims[0], 0, -dims[0] // 2, "X Slice")
+        sw_yz = make_slice_slider(sp.at((0.59, 0.05), (0.74, 0.05)),
+                                  -dims[0], 0, -dims[0] // 2, "X Slice")
         sw_yz.SetInteractor(iren)
         sw_yz.EnabledOn()
         callback_yz = SlicePlaneCallback(nrrd_reader, label_reader, 
-            slice_actors_gray['YZ'], slice_actors_labels['YZ'], 'YZ', slice_transforms['YZ'], lut)
+            slice_actors_gray['YZ'], slice_actors_labels['YZ'], 'YZ', slice_planes['YZ'])
         sw_yz.AddObserver(vtkCommand.InteractionEvent, callback_yz)
+        sw_yz.AddObserver(vtkCommand.EndInteractionEvent, callback_yz)
         sliders['X Slice'] = sw_yz
         
         # 7g: Zainicjalizuj slice'y (wywołaj callbacki raz)
@@ -239,48 +279,82 @@ def main():
     
     mesh_actors_list = {}  # Słownik przechowujący aktorów
     
+    # 8a: Wczytaj wszystkie pliki VTK równolegle
+    # Odczyt i parsowanie plików to głównie I/O - wątki nakładają na siebie
+    # oczekiwanie na dysk. Każdy wątek ma własny reader; filtry, mappery i
+    # aktory (nie są thread-safe) budujemy dalej w wątku głównym
+    vtk_paths = [resolve_vtk_file(tissue, params.vtk_files, params.tissue_index)
+                 for tissue in tissues]
+    with ThreadPoolExecutor(max_workers=min(len(vtk_paths), os.cpu_count() or 1) or 1) as executor:
+        meshes = list(executor.map(_read_polydata, vtk_paths))
+    
+    # Parametry tkanek jako równoległe listy (w kolejności tissues) - pętla
+    # dostaje je przez zip, bez wyszukiwania w słownikach po nazwie tkanki
+    orders = [params.orientation[tissue] for tissue in tissues]
+    opacities = [params.opacity[tissue] for tissue in tissues]
+    color_indices = [params.indices[tissue] for tissue in tissues]
+    
+    # Współrzędne X suwaków opacity dla każdej kolumny: col -> (początek, koniec)
+    col_coords = ((right_x0_col1, right_x1_col1), (right_x0_col2, right_x1_col2))
+    
+    # Transformacje orientacji - większość tkanek ma tę samą orientację, więc
+    # każdą budujemy raz: {orientacja: vtkTransform}
+    trans_cache = {}
+    
     # Dla każdej tkanki z listy
-    for idx, tissue in enumerate(tissues):
-        
-        # 8a: Wczytaj plik VTK
-        reader = vtkPolyDataReader()
-        vtk_path = resolve_vtk_file(tissue, params['vtk_files'])
-        reader.SetFileName(str(vtk_path))
-        reader.Update()
+    for idx, (tissue, mesh, order, opacity, color_idx) in enumerate(
+            zip(tissues, meshes, orders, opacities, color_indices)):
 
         # 8b: Zastosuj transformację orientacji
         # Dane mogą być zapisane w różnych układach współrzędnych
         # Transformacja dopasowuje je do układu
-        trans = SliceOrder().get(params['orientation'][tissue])
-        trans.Scale(1, -1, -1)  # Dodatkowo odbijamy Y i Z
-
-        # Zastosuj transformację do geometrii
+        trans = trans_cache.get(order)
+        if trans is None:
+            # Kopia - Scale() nie może zmienić transformacji z SliceOrder
+            trans = vtkTransform()
+            trans.DeepCopy(SLICE_ORDER.get(order))
+            trans.Scale(1, -1, -1)  # Dodatkowo odbijamy Y i Z
+            trans_cache[order] = trans
+
+        # Zastosuj transformację do geometrii (gotowy dataset - bez połączenia
+        # z readerem, więc pipeline nie ma czego ponownie wykonywać)
         tf = vtkTransformPolyDataFilter()
-        tf.SetInputConnection(reader.GetOutputPort())
+        tf.SetInputData(mesh)
         tf.SetTransform(trans)
+        tf.Update()
 
         # 8c: Oblicz normale (dla prawidłowego oświetlenia)
+        # Mesh'e się nie zmieniają, więc liczymy normale jeden raz, tutaj -
+        # mapper dostaje gotowy dataset zamiast filtra w pipeline renderowania
         normals = vtkPolyDataNormals()
-        normals.SetInputConnection(tf.GetOutputPort())
+        normals.SetInputData(tf.GetOutput())
+        normals.Update()
 
         # 8d: Stwórz mapper (konwertuje geometrię na piksele)
         mapper = vtkPolyDataMapper()
-        mapper.SetInputConnection(normals.GetOutputPort())
+        mapper.SetInputData(normals.GetOutput())
+        # Geometria jest statyczna - mapper nie musi sprawdzać pipeline'u
+        # wejścia przy każdym renderze (np. przy obracaniu kamery)
+        mapper.SetStatic(True)
+        
+        # Mapper ma już gotową geometrię z normalnymi - wczytany mesh, filtr
+        # transformacji i filtr normalnych nie są potrzebne. Zwalniamy referencje,
+        # żeby VTK od razu zwolnił pośrednie dane (zamiast trzymać je dla każdej
+        # tkanki do końca działania programu)
+        meshes[idx] = None
+        mesh = tf = normals = None
 
         # 8e: Stwórz aktor (obiekt do wyświetlenia)
         actor = vtkActor()
         actor.SetMapper(mapper)
         
         # Ustaw przezroczystość z konfiguracji
-        actor.GetProperty().SetOpacity(params['opacity'][tissue])
+        actor.GetProperty().SetOpacity(opacity)
         
         # Ustaw kolor z LUT (według indeksu z konfiguracji)
-        actor.GetProperty().SetDiffuseColor(lut.GetTableValue(params['indices'][tissue])[:3])
-        
-        # Dodaj do sceny
-        ren.AddActor(actor)
+        actor.GetProperty().SetDiffuseColor(lut_rgb[color_idx])
 
-        # Zapisz w słowniku (potrzebne do callbacków)
+        # Zapisz w słowniku (potrzebne do callbacków i do dodania do sceny)
         mesh_actors_list[tissue] = actor
 
         # 8f: Stwórz suwak do kontroli przezroczystości
@@ -293,31 +367,36 @@ def main():
         row = idx // 2       # Rząd: 0, 1, 2, ...
         y = top_y - row * step_y  # Pozycja Y
 
-        # Ustaw współrzędne w zależności od kolumny
-        if col == 0:
-            sp.p1 = [right_x0_col1, y]
-            sp.p2 = [right_x1_col1, y]
-        else:
-            sp.p1 = [right_x0_col2, y]
-            sp.p2 = [right_x1_col2, y]
+        # Ustaw współrzędne kolumny z tablicy (bez rozgałęzienia po col)
+        x0, x1 = col_coords[col]
+        sp.p1 = (x0, y)
+        sp.p2 = (x1, y)
 
         # Stwórz widget suwaka
-        sw = make_slider_widget(sp, lut, params['indices'][tissue])
+        sw = make_slider_widget(sp, lut, color_idx)
         sw.SetInteractor(iren)
         sw.EnabledOn()
         
         # Podłącz callback (zmiana opacity gdy użytkownik przesuwa suwak)
-        sw.AddObserver(vtkCommand.InteractionEvent, SliderCallback(actor.GetProperty()))
+        sw.AddObserver(vtkCommand.InteractionEvent,
+                       make_opacity_callback(actor.GetProperty(), sw.GetRepresentation()))
         
         # Zapisz w słowniku
         sliders[tissue] = sw
+    
+    # 8g: Dodaj wszystkie mesh'e do sceny naraz - po zbudowaniu wszystkich mapperów
+    for actor in mesh_actors_list.values():
+        ren.AddActor(actor)
 
     
     # 9: KONFIGURACJA SCENY (tło, rozmiar okna)
     
     
+    # Jedna paleta nazwanych kolorów dla tła i kostki orientacji
+    named_colors = vtkNamedColors()
+    
     # Ustaw kolor tła (SlateGray = ciemnoszary, profesjonalnie wygląda)
-    ren.SetBackground(vtkNamedColors().GetColor3d('SlateGray'))
+    ren.SetBackground(named_colors.GetColor3d('SlateGray'))
     
     # Ustaw rozmiar okna w pikselach
     win.SetSize(1400, 1000)  # Szerokość x wysokość
@@ -333,13 +412,21 @@ def main():
     cow = vtkCameraOrientationWidget()
     cow.SetParentRenderer(ren)
     cow.On()
+    # Na czas obracania/przesuwania kamery wyłącz widget (jego mini-scena nie
+    # jest wtedy przerysowywana przy każdym ruchu) - wraca po puszczeniu myszy
+    pause_cow, resume_cow = make_interaction_pause_callbacks(cow, win)
+    style = iren.GetInteractorStyle()
+    style.AddObserver('StartInteractionEvent', pause_cow)
+    style.AddObserver('EndInteractionEvent', resume_cow)
 
     # 10b: Marker orientacji (kostka + osie, w rogu dolnym)
     om = vtkOrientationMarkerWidget()
-    om.SetOrientationMarker(make_cube_actor('rsp', vtkNamedColors()))
+    om.SetOrientationMarker(make_cube_actor('rsp', named_colors))
     om.SetInteractor(iren)
-    om.SetViewport(0, 0, 0.2, 0.2)  # Lewy dolny róg, 20% rozmiaru
+    om.SetViewport(0, 0, 0.15, 0.15)  # Lewy dolny róg, 15% rozmiaru
     om.EnabledOn()
+    # Marker tylko pokazuje orientację - bez obsługi myszy (przesuwania/skalowania)
+    om.InteractiveOff()
 
     
     # 11: KONFIGURACJA KAMERY (widok początkowy)
@@ -351,22 +438,13 @@ def main():
     # Pobierz kamerę (żeby ją ręcznie dostroić)
     camera = ren.GetActiveCamera()
     
-    # Przesuń focal point (punkt na który patrzy kamera) i pozycję kamery w X
-    fp = list(camera.GetFocalPoint())
-    pos = list(camera.GetPosition())
-    fp[0] += 130   # Focal point w prawo
-    pos[0] += 130  # Kamera w prawo
-    camera.SetFocalPoint(fp)
-    camera.SetPosition(pos)
-    
-    # Zaktualizuj zakres clipping (żeby wszystko było widoczne)
-    ren.ResetCameraClippingRange()
-    
-    # Dodatkowo przesuń kamerę
-    pos = list(camera.GetPosition())
-    pos[0] -= 150  # W lewo
-    pos[2] -= 50   # W dół
-    camera.SetPosition(pos)
+    # Przesuń focal point (punkt na który patrzy kamera) i pozycję kamery.
+    # Oba przesunięcia kamery (+130 w prawo razem z focal point, potem -150 w
+    # lewo i -50 w dół) składamy w jedno i ustawiamy raz
+    fx, fy, fz = camera.GetFocalPoint()
+    px, py, pz = camera.GetPosition()
+    camera.SetFocalPoint(fx + 130, fy, fz)       # Focal point w prawo
+    camera.SetPosition(px + 130 - 150, py, pz - 50)  # Kamera: w prawo, w lewo i w dół
     
     # Dolly = zoom (0.9 = lekko oddal)
     camera.Dolly(0.9)
@@ -86,17 +86,22 @@ def make_annotated_cube_actor(cube_labels, colors):
     # - Y (góra/dół lub przód/tył) = niebieski
     # - Z (przód/tył lub góra/dół) = zielony
     
+    # Każdy kolor pobieramy z palety raz i używamy dla obu ścian pary
+    red = colors.GetColor3d('Tomato')
+    blue = colors.GetColor3d('DeepSkyBlue')
+    green = colors.GetColor3d('SeaGreen')
+    
     # Ściany X (prawo/lewo) - czerwone 
-    cube.GetXPlusFaceProperty().SetColor(colors.GetColor3d('Tomato'))
-    cube.GetXMinusFaceProperty().SetColor(colors.GetColor3d('Tomato'))
+    cube.GetXPlusFaceProperty().SetColor(red)
+    cube.GetXMinusFaceProperty().SetColor(red)
     
     # Ściany Y - niebieskie 
-    cube.GetYPlusFaceProperty().SetColor(colors.GetColor3d('DeepSkyBlue'))
-    cube.GetYMinusFaceProperty().SetColor(colors.GetColor3d('DeepSkyBlue'))
+    cube.GetYPlusFaceProperty().SetColor(blue)
+    cube.GetYMinusFaceProperty().SetColor(blue)
     
     # Ściany Z - zielone
-    cube.GetZPlusFaceProperty().SetColor(colors.GetColor3d('SeaGreen'))
-    cube.GetZMinusFaceProperty().SetColor(colors.GetColor3d('SeaGreen'))
+    cube.GetZPlusFaceProperty().SetColor(green)
+    cube.GetZMinusFaceProperty().SetColor(green)
     
     # Zwróć gotową kostkę
     return cube
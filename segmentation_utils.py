@@ -5,39 +5,73 @@ Ten moduł przekształca takie dane segmentacji na wygładzone modele 3D
 które można wyświetlić w przeglądarce VTK.
 
 PROCES GENEROWANIA MODELU 3D:
-1. Wykryj powierzchnię (contouring) - znajdź granicę etykiety
+1. Wykryj powierzchnię (surface nets / contouring) - znajdź granicę etykiety
 2. Wygładź powierzchnię (smoothing) - usuń ostre krawędzie i artefakty
 3. Oblicz normalne (normals) - potrzebne do prawidłowego oświetlenia
 4. Transformuj (transform) - dostosuj do układu współrzędnych sceny
 5. Stwórz aktora (actor) - obiekt który można wyświetlić
 
+Kroki 1-4 (compute_segmentation_polydata) nie dotykają renderera, więc mogą
+działać na wątku w tle. Krok 5 (create_segmentation_actors) modyfikuje scenę
+i musi być wykonany na głównym wątku VTK.
+
+WYKRYWANIE POWIERZCHNI:
+Od VTK 9.3 powierzchnie wszystkich etykiet wyciąga jedno przejście
+vtkSurfaceNets3D przez objętość (zamiast osobnego marching cubes dla każdej
+etykiety - przy kilkudziesięciu etykietach to dziesiątki sekund różnicy).
+Siatka jest potem dzielona na etykiety po tablicy komórek BoundaryLabels.
+Na starszym VTK zostaje pętla marching cubes (vtkFlyingEdges3D) po etykietach.
+
 WYKRYWANIE DUPLIKATÓW:
 wykorzystywana jest geometry_utils.py do wykrywania i eliminacji duplikatów
 """
 
+import math
+import os
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from itertools import repeat
+
+from vtkmodules.vtkCommonDataModel import vtkDataObject, vtkPolyData
 from vtkmodules.vtkCommonTransforms import vtkTransform
-from vtkmodules.vtkFiltersCore import vtkPolyDataNormals, vtkSmoothPolyDataFilter, vtkContourFilter
+from vtkmodules.vtkFiltersCore import (
+    vtkPolyDataNormals, vtkSmoothPolyDataFilter, vtkFlyingEdges3D, vtkThreshold,
+    vtkQuadricDecimation
+)
 from vtkmodules.vtkFiltersGeneral import vtkTransformPolyDataFilter
-from vtkmodules.vtkRenderingCore import vtkActor, vtkPolyDataMapper
+from vtkmodules.vtkFiltersGeometry import vtkGeometryFilter
+from vtkmodules.vtkImagingStatistics import vtkImageAccumulate
+from vtkmodules.vtkRenderingCore import vtkActor, vtkPolyDataMapper, vtkProperty
 
 from geometry_utils import calculate_polydata_signature, are_polydata_similar
 
+# vtkSurfaceNets3D jest dostępny od VTK 9.3 - na starszych wersjach
+# _extract_label_surfaces() używa marching cubes osobno dla każdej etykiety
+try:
+    from vtkmodules.vtkFiltersCore import vtkSurfaceNets3D
+except ImportError:
+    vtkSurfaceNets3D = None
+
+# Powierzchnie z mniejszą liczbą punktów nie są wygładzane - przy tak małych
+# strukturach efekt 20 iteracji Laplace'a jest niewidoczny, a czas nie
+_SMALL_MESH_POINTS = 500
 
-def create_segmentation_3d_model(label_reader, lut, renderer, mesh_actors_list, similarity_threshold=0.90):
+# Powierzchnie z mniejszą liczbą punktów są pomijane - to pojedyncze voxele
+# (szum segmentacji, np. sześcian z 8 punktów), a nie struktury anatomiczne
+_MIN_SURFACE_POINTS = 50
+
+
+def create_segmentation_3d_model(label_reader, lut, renderer, mesh_actors_list, similarity_threshold=0.90,
+                                 target_reduction=0.5):
     """
     Tworzy modele 3D ze wszystkich etykiet w danych segmentacji, pomijając duplikaty.
     
     Ta funkcja przetwarza plik z etykietami segmentacji i generuje osobny model 3D
     dla każdej unikalnej struktury anatomicznej.
     
-    ALGORYTM:
-    1. Usuń stare modele segmentacji (jeśli istnieją)
-    2. Dla każdej etykiety (1, 2, 3, ... max):
-       a) Wygeneruj powierzchnię metodą marching cubes (contouring)
-       b) Wygładź powierzchnię filtrem Laplace'a
-       c) Oblicz normalne do powierzchni
-       d) Sprawdź czy to nie duplikat (porównaj z już przetworzonymi)
-       e) Jeśli unikalny - dodaj do sceny
+    Wersja synchroniczna - łączy dwa kroki które można też wywołać osobno:
+    1. compute_segmentation_polydata() - ciężkie obliczenia (można na innym wątku)
+    2. create_segmentation_actors() - aktory + renderer (tylko główny wątek VTK)
     
     Args:
         label_reader (vtkNrrdReader): Źródło danych z etykietami segmentacji
@@ -48,6 +82,9 @@ def create_segmentation_3d_model(label_reader, lut, renderer, mesh_actors_list,
             - 0.90 (domyślnie) = obiekty o 90%+ podobieństwie to duplikaty
             - 1.0 = tylko identyczne obiekty
             - 0.0 = wyłącza wykrywanie duplikatów (przydatne do debugowania)
+        target_reduction (float): Jaką część trójkątów usunąć decymacją (0.0-1.0)
+            - 0.5 (domyślnie) = o połowę mniej trójkątów do wysłania na GPU
+            - 0.0 = bez decymacji
     
     Returns:
         list: Lista vtkActor z wygenerowanymi modelami 3D
@@ -65,175 +102,412 @@ def create_segmentation_3d_model(label_reader, lut, renderer, mesh_actors_list,
         >>> print(f"Wygenerowano {len(actors)} unikalnych modeli")
     """
     
-    # 1: Usuń stare modele segmentacji (jeśli istnieją)
-    
-    # Przechodzimy przez wszystkich aktorów w scenie
-    for actor in list(renderer.GetActors()):
-        # Sprawdzamy czy aktor ma flagę "_is_segmentation_3d"
-        # (taką flagę ustawiamy na aktorach tworzonych przez tę funkcję)
-        if hasattr(actor, "_is_segmentation_3d"):
-            # Usuwamy stary model żeby nie nakładały się na siebie
-            renderer.RemoveActor(actor)
-
-    # 2: Przygotuj dane wejściowe
-    
     # Upewnij się że dane są aktualne
     label_reader.Update()
-    image_data = label_reader.GetOutput()
     
-    # Sprawdź zakres wartości etykiet w danych
-    # GetScalarRange() zwraca (min, max) wartości w obrazie
-    scalar_min, scalar_max = image_data.GetScalarRange()
+    label_polydata = compute_segmentation_polydata(label_reader.GetOutput(), similarity_threshold,
+                                                   target_reduction)
+    return create_segmentation_actors(label_polydata, lut, renderer)
 
-    # 3: Przygotuj struktury do przechowywania wyników
+
+def compute_segmentation_polydata(image_data, similarity_threshold=0.90, target_reduction=0.5):
+    """
+    Generuje wygładzone powierzchnie 3D dla każdej etykiety, pomijając duplikaty.
     
-    # Lista na wygenerowane aktory (to będzie wynik funkcji)
-    segmentation_actors = []
+    Ta funkcja wykonuje całą ciężką pracę (marching cubes, wygładzanie, normalne)
+    i NIE dotyka renderera ani readera - pracuje tylko na przekazanym obrazie.
+    Dzięki temu można ją uruchomić na wątku w tle (patrz SliderToggleCallback).
+    
+    ALGORYTM:
+    Dla każdej etykiety (1, 2, 3, ... max):
+       a) Weź powierzchnię etykiety (surface nets lub marching cubes,
+          patrz _extract_label_surfaces)
+       b) Wygładź powierzchnię filtrem Laplace'a
+       c) Sprawdź czy to nie duplikat (porównaj z już przetworzonymi)
+       d) Zmniejsz liczbę trójkątów (decymacja) i oblicz normalne do powierzchni
+       e) Zastosuj transformację do układu sceny
+    
+    Args:
+        image_data (vtkImageData): Obraz z etykietami segmentacji. Przy pracy na
+            innym wątku przekaż płytką kopię (ShallowCopy) wyjścia readera, żeby
+            wątek nie uruchamiał pipeline'u readera równolegle z głównym wątkiem.
+        similarity_threshold (float): Próg podobieństwa do wykrywania duplikatów
+            (jak w create_segmentation_3d_model)
+        target_reduction (float): Jaką część trójkątów usunąć decymacją
+            (jak w create_segmentation_3d_model)
+    
+    Returns:
+        list: Lista tuple (numer_etykiety, vtkPolyData) w kolejności etykiet
+    """
+    
+    # 1: Przygotuj dane wejściowe
+    
+    # Etykiety które faktycznie występują w obrazie (jedno przejście po
+    # voxelach) - nie liczymy powierzchni dla wartości z zakresu 1..max,
+    # których w danych nie ma
+    labels = present_labels(image_data)
+
+    # 2: Przygotuj struktury do przechowywania wyników
     
     # Lista na sygnatury już przetworzonych obiektów (do wykrywania duplikatów)
     # Każdy element to tuple: (numer_etykiety, sygnatura_geometrii)
+    # Lista jest posortowana po liczbie punktów, a równoległa
+    # lista processed_points trzyma same liczby punktów do wyszukiwania binarnego.
     processed_signatures = []
+    processed_points = []
 
-    # 4: GŁÓWNA PĘTLA - przetwarzaj każdą etykietę
+    # 3: PRZETWARZAJ ETYKIETY
     
-    # Pomijamy 0 (to zwykle tło), zaczynamy od 1
-    for label in range(1, int(scalar_max) + 1):
-        
-        # 4a: Wykryj powierzchnię (contouring)
-        
-        # vtkContourFilter implementuje algorytm "marching cubes"
-        # Znajduje powierzchnię między voxelami o różnych wartościach
-        contour = vtkContourFilter()
-        contour.SetInputConnection(label_reader.GetOutputPort())
-        
-        # SetValue(0, label) oznacza:
-        # "Znajdź powierzchnię gdzie wartość = label"
-        # 0 to indeks izolinii (możemy mieć wiele, ale tutaj tylko jedną)
-        contour.SetValue(0, label)
-        contour.Update()
-        
-        # Sprawdź czy contour nie jest pusty
-        # Pusta siatka = ta etykieta nie istnieje w danych
-        if contour.GetOutput().GetNumberOfPoints() == 0:
-            continue  # Pomijamy i przechodzimy do następnej etykiety
-
-        # 4b: Wygładź powierzchnię (smoothing)
+    # Łańcuchy filtrów różnych etykiet są niezależne, a VTK zwalnia GIL na czas
+    # Update() - wygładzanie i normalne liczymy równolegle w puli wątków.
+    # Każde zadanie tworzy własne filtry i czyta tylko własną powierzchnię.
+    # Wykrywanie duplikatów zostaje sekwencyjne (w kolejności etykiet), żeby
+    # wynik był taki sam jak przy przetwarzaniu po kolei.
+    with ThreadPoolExecutor(max_workers=os.cpu_count() or 1) as executor:
         
-        # vtkSmoothPolyDataFilter używa algorytmu Laplace'a
-        # Przesuwa każdy wierzchołek w kierunku średniej pozycji sąsiadów
-        smoother = vtkSmoothPolyDataFilter()
-        smoother.SetInputConnection(contour.GetOutputPort())
+        # 3a: Wykryj powierzchnię - generator zwraca tylko niepuste powierzchnie
+        # (etykiety których nie ma w danych są pomijane)
+        surfaces = list(_extract_label_surfaces(image_data, labels))
         
-        # Liczba iteracji - im więcej, tym gładszy model
-        # 20 to dobry kompromis między gładkością a zachowaniem kształtu
-        smoother.SetNumberOfIterations(20)
+        # 3b: Wygładź powierzchnie i policz ich sygnatury (równolegle)
+        smoothed = list(executor.map(_smooth_surface, [surface for _, surface in surfaces]))
         
-        # Współczynnik relaksacji (0.0 - 1.0)
-        # Kontroluje jak bardzo wierzchołki mogą się przesuwać
-        # 0.1 = konserwatywne wygładzanie, zachowuje szczegóły
-        # 0.5 = agresywne, może zniekształcić model
-        smoother.SetRelaxationFactor(0.1)
+        # 3c: Sprawdź czy to nie duplikat (sekwencyjnie)
+        kept = []
+        for (label, _), (smooth_polydata, current_signature) in zip(surfaces, smoothed):
+            
+            # Porównaj tylko z obiektami, które mogą przejść test liczby punktów.
+            # are_polydata_similar() wymaga min/max >= próg, czyli liczba punktów
+            # poprzednika musi leżeć w [n * próg, n / próg]. Zakres znajdujemy
+            # wyszukiwaniem binarnym (margines 1 chroni przed zaokrągleniem float),
+            # więc wynik jest taki sam jak przy porównaniu ze wszystkimi.
+            num_points = current_signature['num_points']
+            lo = 0
+            hi = len(processed_points)
+            if similarity_threshold > 0:
+                lo = bisect_left(processed_points, num_points * similarity_threshold - 1)
+                hi = bisect_right(processed_points, num_points / similarity_threshold + 1)
+            
+            is_duplicate = False
+            for prev_label, prev_sig in processed_signatures[lo:hi]:
+                # Jeśli geometrie są bardzo podobne, to prawdopodobnie duplikat
+                if are_polydata_similar(current_signature, prev_sig, similarity_threshold):
+                    is_duplicate = True
+                    break  # Nie musimy sprawdzać dalej
+            
+            # Jeśli to duplikat, pomijamy i idziemy dalej
+            if is_duplicate:
+                continue
+            
+            # To nie jest duplikat, zapisujemy sygnaturę na przyszłość
+            # (w miejscu wynikającym z liczby punktów, żeby obie listy były posortowane)
+            pos = bisect_right(processed_points, num_points)
+            processed_points.insert(pos, num_points)
+            processed_signatures.insert(pos, (label, current_signature))
+            kept.append((label, smooth_polydata))
         
-        # FeatureEdgeSmoothing = wygładzanie ostrych krawędzi
-        # Wyłączamy bo chcemy zachować anatomiczne cechy (np. ostre załamania)
-        smoother.FeatureEdgeSmoothingOff()
+        # 3d-3e: Decymacja, normalne i transformacja do układu sceny (równolegle)
+        finished = executor.map(_finish_surface, [polydata for _, polydata in kept],
+                                repeat(target_reduction))
         
-        # BoundarySmoothing = wygładzanie brzegów dziur w siatce
-        # Włączamy bo pomaga zamknąć małe luki w segmentacji
-        smoother.BoundarySmoothingOn()
-        
-        smoother.Update()
+        # Zapisz gotową geometrię (wszystko policzone, mapper nie musi uruchamiać filtrów)
+        label_polydata = [(label, polydata) for (label, _), polydata in zip(kept, finished)]
+    
+    return label_polydata
 
-        # 4c: Sprawdź czy to nie duplikat
-        
-        # Oblicz "odcisk palca" geometryczny dla tego obiektu
-        current_signature = calculate_polydata_signature(smoother.GetOutput())
-        
-        # Porównaj z wszystkimi już przetworzonymi obiektami
-        is_duplicate = False
-        for prev_label, prev_sig in processed_signatures:
-            # Jeśli geometrie są bardzo podobne, to prawdopodobnie duplikat
-            if are_polydata_similar(current_signature, prev_sig, similarity_threshold):
-                is_duplicate = True
-                break  # Nie musimy sprawdzać dalej
+
+def _smooth_surface(surface):
+    """
+    Wygładza powierzchnię etykiety i liczy jej sygnaturę (zadanie dla puli wątków).
+    
+    Powierzchnie poniżej _SMALL_MESH_POINTS punktów są zwracane bez wygładzania,
+    a liczba iteracji maleje z rozmiarem siatki (od 20 do 5).
+    
+    Args:
+        surface (vtkPolyData): Powierzchnia z _extract_label_surfaces()
+    
+    Returns:
+        tuple: (wygładzony vtkPolyData, sygnatura z calculate_polydata_signature)
+    """
+    num_points = surface.GetNumberOfPoints()
+    
+    # Małe struktury zostawiamy bez wygładzania
+    if num_points < _SMALL_MESH_POINTS:
+        return surface, calculate_polydata_signature(surface)
+    
+    # vtkSmoothPolyDataFilter używa algorytmu Laplace'a
+    # Przesuwa każdy wierzchołek w kierunku średniej pozycji sąsiadów
+    smoother = vtkSmoothPolyDataFilter()
+    smoother.SetInputData(surface)
+    
+    # Liczba iteracji - im więcej, tym gładszy model
+    # 20 to dobry kompromis między gładkością a zachowaniem kształtu dla
+    # mniejszych siatek; duże siatki (gęste, mniej schodkowe względem rozmiaru)
+    # dostają mniej iteracji, ale nie mniej niż 5
+    smoother.SetNumberOfIterations(min(20, max(5, int(3000 / math.sqrt(num_points)))))
+    
+    # Współczynnik relaksacji (0.0 - 1.0)
+    # Kontroluje jak bardzo wierzchołki mogą się przesuwać
+    # 0.1 = konserwatywne wygładzanie, zachowuje szczegóły
+    # 0.5 = agresywne, może zniekształcić model
+    smoother.SetRelaxationFactor(0.1)
+    
+    # FeatureEdgeSmoothing = wygładzanie ostrych krawędzi
+    # Wyłączamy bo chcemy zachować anatomiczne cechy (np. ostre załamania)
+    smoother.FeatureEdgeSmoothingOff()
+    
+    # BoundarySmoothing = wygładzanie brzegów dziur w siatce
+    # Włączamy bo pomaga zamknąć małe luki w segmentacji
+    smoother.BoundarySmoothingOn()
+    
+    smoother.Update()
+    
+    # Oblicz "odcisk palca" geometryczny dla tego obiektu (do wykrywania duplikatów)
+    return smoother.GetOutput(), calculate_polydata_signature(smoother.GetOutput())
+
+
+def _finish_surface(polydata, target_reduction):
+    """
+    Decymuje powierzchnię, liczy normalne i przenosi ją do układu sceny
+    (zadanie dla puli wątków).
+    
+    Args:
+        polydata (vtkPolyData): Wygładzona powierzchnia z _smooth_surface()
+        target_reduction (float): Jaką część trójkątów usunąć (0.0 = bez decymacji)
+    
+    Returns:
+        vtkPolyData: Gotowa geometria dla mappera
+    """
+    # Decymacja przed normalnymi - normalne liczymy już dla siatki, która
+    # trafi na GPU (vtkQuadricDecimation nie przenosi normalnych wejścia)
+    if target_reduction > 0:
+        decimate = vtkQuadricDecimation()
+        decimate.SetInputData(polydata)
+        # Zachowaj objętość - małe struktury nie "kurczą się" po decymacji
+        decimate.VolumePreservationOn()
+        decimate.SetTargetReduction(target_reduction)
+        decimate.Update()
+        polydata = decimate.GetOutput()
+    
+    # Normalne to wektory prostopadłe do powierzchni
+    # Są potrzebne do prawidłowego oświetlenia (shading) modelu
+    normals = vtkPolyDataNormals()
+    normals.SetInputData(polydata)
+    
+    # FeatureAngle określa kąt poniżej którego krawędź jest "gładka"
+    # 60° = krawędzie ostrzejsze niż 60° będą miały wyraźne załamanie
+    normals.SetFeatureAngle(60.0)
+    
+    # SplittingOff = nie rozdzielaj siatki na osobne kawałki
+    # (nawet jeśli są ostre krawędzie)
+    normals.SplittingOff()
+    
+    # Tworzymy transformację żeby dostosować model do układu sceny
+    transform = vtkTransform()
+    
+    # Scale(1, -1, 1) = odbij lustrzanie względem osi Y
+    # To jest potrzebne bo VTK i NRRD mają różne konwencje układu współrzędnych
+    # UWAGA: Używamy (1,-1,1) a nie (1,-1,-1) jak dla slice'ów!
+    # To dlatego że modele 3D wymagają innej orientacji niż płaszczyzny 2D
+    transform.Scale(1, -1, 1)
+    
+    # Zastosuj transformację do geometrii
+    tf = vtkTransformPolyDataFilter()
+    tf.SetInputConnection(normals.GetOutputPort())
+    tf.SetTransform(transform)
+    tf.Update()
+    return tf.GetOutput()
+
+
+def present_labels(image_data):
+    """
+    Zwraca posortowaną listę niezerowych etykiet występujących w obrazie.
+    
+    Przejście po voxelach robi vtkImageAccumulate (w C++): histogram z jednym
+    koszykiem na każdą wartość z zakresu skalarów. Python czyta tylko koszyki
+    histogramu, których jest tyle co wartości w zakresie (np. 46), a nie voxeli.
+    
+    Args:
+        image_data (vtkImageData): Obraz z etykietami segmentacji (0 = tło)
+    
+    Returns:
+        list: Etykiety (int) w kolejności rosnącej, bez tła
+    """
+    # Etykiety są całkowite, więc zakres wyznacza liczbę koszyków
+    low, high = (int(v) for v in image_data.GetScalarRange())
+    
+    # Koszyk i zlicza voxele o wartości low + i
+    accumulate = vtkImageAccumulate()
+    accumulate.SetInputData(image_data)
+    accumulate.SetComponentExtent(0, high - low, 0, 0, 0, 0)
+    accumulate.SetComponentOrigin(low, 0, 0)
+    accumulate.SetComponentSpacing(1, 1, 1)
+    accumulate.Update()
+    
+    counts = memoryview(accumulate.GetOutput().GetPointData().GetScalars())
+    return [low + i for i, count in enumerate(counts) if count and low + i != 0]
+
+
+def _extract_label_surfaces(image_data, labels):
+    """
+    Generator powierzchni podanych etykiet, bez pustych i szczątkowych powierzchni.
+    
+    Z vtkSurfaceNets3D (VTK 9.3+) cała objętość jest przetwarzana raz: filtr
+    tworzy jedną siatkę granic wszystkich etykiet, a każda komórka ma w tablicy
+    BoundaryLabels dwie etykiety, które rozdziela. Powierzchnię etykiety
+    wybieramy z tej siatki filtrem vtkThreshold (komórki, w których któraś z
+    dwóch etykiet jest równa szukanej). Bez vtkSurfaceNets3D - osobny
+    vtkFlyingEdges3D (marching cubes) dla każdej etykiety.
+    
+    Powierzchnie poniżej _MIN_SURFACE_POINTS punktów są pomijane.
+    
+    Args:
+        image_data (vtkImageData): Obraz z etykietami segmentacji (0 = tło)
+        labels (list): Etykiety do wyciągnięcia (np. z present_labels())
+    
+    Yields:
+        tuple: (numer_etykiety, vtkPolyData) w kolejności etykiet
+    """
+    if vtkSurfaceNets3D is None:
+        for label in labels:
+            # vtkFlyingEdges3D to wielowątkowa implementacja "marching cubes"
+            # dla obrazów (ta sama powierzchnia co z vtkContourFilter)
+            # SetValue(0, label) = "znajdź powierzchnię gdzie wartość = label"
+            contour = vtkFlyingEdges3D()
+            contour.SetInputData(image_data)
+            contour.SetValue(0, label)
+            # Normalne i tak liczymy po wygładzeniu - tu byłyby zbędne
+            contour.ComputeNormalsOff()
+            contour.ComputeGradientsOff()
+            contour.ComputeScalarsOff()
+            contour.Update()
+            
+            # Pusta siatka = ta etykieta nie istnieje w danych,
+            # kilka punktów = pojedyncze voxele
+            if contour.GetOutput().GetNumberOfPoints() >= _MIN_SURFACE_POINTS:
+                yield label, contour.GetOutput()
+        return
+    
+    # Jedno przejście przez objętość - granice wszystkich etykiet naraz.
+    # Wbudowane wygładzanie filtra wyłączamy - powierzchnie i tak wygładza
+    # _smooth_surface(), tak samo jak te z marching cubes;
+    # trójkąty zamiast czworokątów, bo tak jak z marching cubes oczekują
+    # ich dalsze filtry (wygładzanie, normalne)
+    surface_nets = vtkSurfaceNets3D()
+    surface_nets.SetInputData(image_data)
+    surface_nets.SmoothingOff()
+    surface_nets.SetBackgroundLabel(0)
+    # Etykiety trzeba podać jawnie - bez listy filtr traktuje wszystko co nie
+    # jest tłem jako jeden obszar i zwraca tylko jego zewnętrzną granicę
+    surface_nets.SetNumberOfLabels(len(labels))
+    for i, label in enumerate(labels):
+        surface_nets.SetLabel(i, label)
+    surface_nets.SetOutputMeshTypeToTriangles()
+    surface_nets.Update()
+    
+    # Komórki na granicy etykiety: label w dowolnej z dwóch składowych BoundaryLabels.
+    # Jeden łańcuch filtrów dla wszystkich etykiet - zmieniamy tylko zakres progu
+    threshold = vtkThreshold()
+    threshold.SetInputData(surface_nets.GetOutput())
+    threshold.SetInputArrayToProcess(
+        0, 0, 0, vtkDataObject.FIELD_ASSOCIATION_CELLS, 'BoundaryLabels')
+    threshold.SetComponentModeToUseAny()
+    threshold.SetThresholdFunction(vtkThreshold.THRESHOLD_BETWEEN)
+    
+    # vtkThreshold zwraca vtkUnstructuredGrid - z powrotem do vtkPolyData
+    geometry = vtkGeometryFilter()
+    geometry.SetInputConnection(threshold.GetOutputPort())
+    
+    for label in labels:
+        threshold.SetLowerThreshold(label)
+        threshold.SetUpperThreshold(label)
+        geometry.Update()
         
-        # Jeśli to duplikat, pomijamy i idziemy dalej
-        if is_duplicate:
+        if geometry.GetOutput().GetNumberOfPoints() < _MIN_SURFACE_POINTS:
             continue
-        
-        # To nie jest duplikat, zapisujemy sygnaturę na przyszłość
-        processed_signatures.append((label, current_signature))
+        # Wyjście filtra jest nadpisywane przy następnej etykiecie, a powierzchnie
+        # są przetwarzane dopiero po zebraniu wszystkich - każda dostaje własny obiekt
+        # (ShallowCopy wystarcza: filtr tworzy nowe tablice przy każdym Update())
+        surface = vtkPolyData()
+        surface.ShallowCopy(geometry.GetOutput())
+        yield label, surface
 
-        # 4d: Oblicz normalne do powierzchni
-        
-        # Normalne to wektory prostopadłe do powierzchni
-        # Są potrzebne do prawidłowego oświetlenia (shading) modelu
-        normals = vtkPolyDataNormals()
-        normals.SetInputConnection(smoother.GetOutputPort())
-        
-        # FeatureAngle określa kąt poniżej którego krawędź jest "gładka"
-        # 60° = krawędzie ostrzejsze niż 60° będą miały wyraźne załamanie
-        normals.SetFeatureAngle(60.0)
-        
-        # SplittingOff = nie rozdzielaj siatki na osobne kawałki
-        # (nawet jeśli są ostre krawędzie)
-        normals.SplittingOff()
 
-        # 4e: Zastosuj transformację przestrzenną
-        
-        # Tworzymy transformację żeby dostosować model do układu sceny
-        transform = vtkTransform()
-        
-        # Scale(1, -1, 1) = odbij lustrzanie względem osi Y
-        # To jest potrzebne bo VTK i NRRD mają różne konwencje układu współrzędnych
-        # UWAGA: Używamy (1,-1,1) a nie (1,-1,-1) jak dla slice'ów!
-        # To dlatego że modele 3D wymagają innej orientacji niż płaszczyzny 2D
-        transform.Scale(1, -1, 1)
-
-        # Zastosuj transformację do geometrii
-        tf = vtkTransformPolyDataFilter()
-        tf.SetInputConnection(normals.GetOutputPort())
-        tf.SetTransform(transform)
-        tf.Update()
-
-        # 4f: Stwórz mapper (konwerter geometria->obraz)
+def create_segmentation_actors(label_polydata, lut, renderer):
+    """
+    Tworzy aktory dla powierzchni z compute_segmentation_polydata() i dodaje je do sceny.
+    
+    Ta funkcja modyfikuje renderer, więc musi być wywołana na głównym wątku VTK
+    (tym samym na którym działa interaktor i renderowanie).
+    
+    Args:
+        label_polydata (list): Lista tuple (numer_etykiety, vtkPolyData)
+        lut (vtkLookupTable): Tablica kolorów do pokolorowania modeli
+        renderer (vtkRenderer): Renderer do którego dodajemy wygenerowane modele
+    
+    Returns:
+        list: Lista vtkActor z wygenerowanymi modelami 3D
+    """
+    
+    # 1: Usuń stare modele segmentacji (jeśli istnieją)
+    
+    # Aktory z poprzedniego wywołania są zapamiętane na rendererze, więc nie
+    # trzeba przeglądać wszystkich aktorów sceny (GetActors() + hasattr)
+    for actor in getattr(renderer, "_segmentation_actors", ()):
+        # Usuwamy stary model żeby nie nakładały się na siebie
+        renderer.RemoveActor(actor)
+    
+    # Lista na wygenerowane aktory (to będzie wynik funkcji)
+    segmentation_actors = []
+    
+    # Wspólny wzorzec materiału (PBR - Physically Based Rendering), kopiowany
+    # do każdego aktora jednym DeepCopy - dla aktora ustawiamy już tylko kolor
+    prototype = vtkProperty()
+    
+    # Opacity = nieprzezroczystość (0.0=przezroczysty, 1.0=nieprzezroczysty)
+    prototype.SetOpacity(0.9)  # 90% nieprzezroczysty
+    
+    # Ambient = oświetlenie otoczenia (światło które jest wszędzie)
+    # 0.5 = 50% koloru pochodzi ze światła otoczenia
+    prototype.SetAmbient(0.5)
+    
+    # Specular = odbicia lustrzane (błyski światła)
+    # 0.5 = średnie odbicia, model wygląda jak półmatowy plastik
+    prototype.SetSpecular(0.5)
+    
+    # SpecularPower = ostrość odbić (im wyższe, tym ostrzejsze błyski)
+    # 50 = dość ostre odbicia, wygląda jak gładka powierzchnia
+    prototype.SetSpecularPower(50)
+    
+    # 2: Dla każdej powierzchni stwórz aktora
+    
+    for label, polydata in label_polydata:
+
+        # 2a: Stwórz mapper (konwerter geometria->obraz)
         
         # vtkPolyDataMapper konwertuje geometrię 3D na piksele 2D do wyświetlenia
         mapper = vtkPolyDataMapper()
-        mapper.SetInputConnection(tf.GetOutputPort())
+        mapper.SetInputData(polydata)
         
         # ScalarVisibilityOff = nie koloruj według wartości w danych
         # (będziemy kolorować ręcznie według LUT)
         mapper.ScalarVisibilityOff()
 
-        # 4g: Stwórz aktor (obiekt do wyświetlenia)
+        # 2b: Stwórz aktor (obiekt do wyświetlenia)
         
         actor = vtkActor()
         actor.SetMapper(mapper)
         
+        # Materiał ze wspólnego wzorca (własna kopia - suwak zmienia
+        # przezroczystość każdego aktora osobno)
+        prop = actor.GetProperty()
+        prop.DeepCopy(prototype)
+        
         # Pobierz kolor dla tej etykiety z LUT
         # GetTableValue zwraca (R, G, B, Alpha), bierzemy tylko RGB ([:3])
-        color = lut.GetTableValue(label)[:3]
-        actor.GetProperty().SetColor(color)
-        
-        # Właściwości materiału (PBR - Physically Based Rendering)
-        
-        # Opacity = nieprzezroczystość (0.0=przezroczysty, 1.0=nieprzezroczysty)
-        actor.GetProperty().SetOpacity(0.9)  # 90% nieprzezroczysty
-        
-        # Ambient = oświetlenie otoczenia (światło które jest wszędzie)
-        # 0.5 = 50% koloru pochodzi ze światła otoczenia
-        actor.GetProperty().SetAmbient(0.5)
-        
-        # Specular = odbicia lustrzane (błyski światła)
-        # 0.5 = średnie odbicia, model wygląda jak półmatowy plastik
-        actor.GetProperty().SetSpecular(0.5)
-        
-        # SpecularPower = ostrość odbić (im wyższe, tym ostrzejsze błyski)
-        # 50 = dość ostre odbicia, wygląda jak gładka powierzchnia
-        actor.GetProperty().SetSpecularPower(50)
+        prop.SetColor(lut.GetTableValue(label)[:3])
 
-        # 4h: Oznacz aktor i dodaj do sceny
+        # 2c: Oznacz aktor i dodaj do sceny
         
         # Dodajemy własne atrybuty do aktora (do późniejszej identyfikacji)
         actor._is_segmentation_3d = True  # Flaga że to model segmentacji
@@ -245,12 +519,14 @@ def create_segmentation_3d_model(label_reader, lut, renderer, mesh_actors_list,
         # Dodaj do listy zwracanych aktorów
         segmentation_actors.append(actor)
 
-    # 5: Finalizacja
+    # 3: Finalizacja
     
     # Zaktualizuj zakres clipping kamery
     # (potrzebne żeby wszystkie obiekty były widoczne)
     renderer.ResetCameraClippingRange()
     
+    # Zapamiętaj aktory na rendererze - następne wywołanie usunie tylko je
+    renderer._segmentation_actors = segmentation_actors
+    
     # Zwróć listę wygenerowanych aktorów
     return segmentation_actors
-
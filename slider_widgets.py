@@ -18,10 +18,84 @@ Pozycje są określone we współrzędnych znormalizowanych (0.0-1.0), gdzie:
 - (1,1) = prawy górny róg
 """
 
+from dataclasses import dataclass, replace
+from functools import lru_cache
+
 from vtkmodules.vtkCommonColor import vtkNamedColors
-from vtkmodules.vtkInteractionWidgets import vtkSliderRepresentation2D, vtkSliderWidget
 
+from lut_utils import lut_rgb_table
+
+
+# Jedna paleta dla wszystkich suwaków (zamiast nowego vtkNamedColors w każdej fabryce)
+_NAMED_COLORS = vtkNamedColors()
+
+
+@lru_cache(maxsize=None)
+def _color3d(name):
+    """
+    Zamienia nazwę koloru z vtkNamedColors na krotkę (R, G, B).
+    
+    Suwaki używają kilku tych samych nazw, więc wynik jest zapamiętywany -
+    tylko pierwsze użycie nazwy odpytuje vtkNamedColors.
+    
+    Args:
+        name (str): Nazwa koloru (np. 'Black', 'BurlyWood')
+    
+    Returns:
+        tuple: (R, G, B) w zakresie 0.0-1.0
+    """
+    return tuple(_NAMED_COLORS.GetColor3d(name))
+
+
+# Liczba pierwszych wpisów LUT używanych jako kolory tytułów w make_slider_widget()
+_LUT_TITLE_COLORS = 23
+
+# Kolory tytułów odczytane z LUT: {id(lut): (lut, czas modyfikacji, kolory)}
+# Trzymamy też referencję do LUT, żeby id() nie zostało użyte ponownie przez inny obiekt
+_lut_title_colors = {}
+
+
+def _title_color_for(lut, idx):
+    """
+    Zwraca kolor tytułu dla indeksu tkanki albo None, jeśli indeks jest poza zakresem.
+    
+    Kolory są odczytywane z LUT raz (jednym kopiowaniem bufora, lut_rgb_table())
+    i odczytywane ponownie tylko po zmianie LUT (GetMTime()).
+    
+    Args:
+        lut (vtkLookupTable): Tablica kolorów tkanek
+        idx (int): Indeks w LUT
+    
+    Returns:
+        tuple lub None: (R, G, B) dla 0 <= idx < 23, w przeciwnym razie None
+    """
+    mtime = lut.GetMTime()
+    entry = _lut_title_colors.get(id(lut))
+    if entry is None or entry[1] != mtime:
+        entry = (lut, mtime, lut_rgb_table(lut)[:_LUT_TITLE_COLORS])
+        _lut_title_colors[id(lut)] = entry
+    colors = entry[2]
+    if 0 <= idx < len(colors):
+        return colors[idx]
+    return None
+
+
+def _rgb(color):
+    """
+    Zwraca kolor jako (R, G, B) - nazwę rozwiązuje przez _color3d(), krotkę zwraca bez zmian.
+    
+    Args:
+        color (str lub tuple): Nazwa z vtkNamedColors albo (R, G, B) w zakresie 0.0-1.0
+    
+    Returns:
+        tuple: (R, G, B) w zakresie 0.0-1.0
+    """
+    if isinstance(color, str):
+        return _color3d(color)
+    return color
 
+
+@dataclass(slots=True)
 class SliderProperties:
     """
     Klasa z domyślnymi właściwościami wyglądu suwaków.
@@ -32,6 +106,10 @@ class SliderProperties:
     
     WZORZEC PROJEKTOWY: Value Object / Configuration Object
     
+    Dataclass ze __slots__: fabryki suwaków czytają kilkanaście atrybutów,
+    a odczyt slotu jest szybszy niż szukanie w __dict__ instancji i klasy.
+    dataclass(slots=True) wymaga Pythona 3.10+.
+    
     Atrybuty geometryczne (rozmiary w jednostkach znormalizowanych):
         tube_width: Grubość paska suwaka
         slider_length: Długość "uchwytu" który się przesuwa
@@ -47,10 +125,11 @@ class SliderProperties:
         value_initial: Początkowa wartość (domyślnie 1.0 = maksimum)
     
     Atrybuty pozycji (współrzędne znormalizowane):
-        p1: [x, y] - początek suwaka (lewy koniec)
-        p2: [x, y] - koniec suwaka (prawy koniec)
+        p1: (x, y) - początek suwaka (lewy koniec)
+        p2: (x, y) - koniec suwaka (prawy koniec)
     
-    Atrybuty kolorów (nazwy kolorów z vtkNamedColors):
+    Atrybuty kolorów (nazwa z vtkNamedColors albo krotka (R, G, B); wartości
+    domyślne są zamieniane na krotki raz, przy imporcie modułu):
         title_color: Kolor tytułu suwaka
         value_color: Kolor wyświetlanej wartości
         slider_color: Kolor ruchomego uchwytu
@@ -61,80 +140,99 @@ class SliderProperties:
     Przykład użycia:
         >>> props = SliderProperties()
         >>> props.title = "Opacity"
-        >>> props.p1 = [0.8, 0.5]  # Zmień pozycję
-        >>> props.p2 = [0.95, 0.5]
+        >>> props.p1 = (0.8, 0.5)  # Zmień pozycję
+        >>> props.p2 = (0.95, 0.5)
         >>> slider = make_slider_widget(props, lut, 0)
+        >>> # albo kopia z inną pozycją, bez zmiany oryginału:
+        >>> slider = make_slider_widget(props.at((0.8, 0.4), (0.95, 0.4)), lut, 1)
     """
     
     # ROZMIARY ELEMENTÓW (w jednostkach znormalizowanych)
     # Te wartości są dobrane eksperymentalnie żeby suwak wyglądał proporcjonalnie
     
-    tube_width = 0.004        # Pasek - dość cienki żeby nie zasłaniał sceny
-    slider_length = 0.015     # Uchwyt - wystarczająco długi żeby łatwo złapać
-    slider_width = 0.008      # Uchwyt - szerszy niż pasek, łatwiej kliknąć
-    end_cap_length = 0.008    # Czapeczki - widoczne ale dyskretne
-    end_cap_width = 0.02      # Czapeczki - szersze od paska, ładnie wyglądają
-    title_height = 0.02       # Tytuł - wystarczająco duży żeby przeczytać
-    label_height = 0.02       # Wartość - taki sam rozmiar jak tytuł
+    tube_width: float = 0.004        # Pasek - dość cienki żeby nie zasłaniał sceny
+    slider_length: float = 0.015     # Uchwyt - wystarczająco długi żeby łatwo złapać
+    slider_width: float = 0.008      # Uchwyt - szerszy niż pasek, łatwiej kliknąć
+    end_cap_length: float = 0.008    # Czapeczki - widoczne ale dyskretne
+    end_cap_width: float = 0.02      # Czapeczki - szersze od paska, ładnie wyglądają
+    title_height: float = 0.02       # Tytuł - wystarczająco duży żeby przeczytać
+    label_height: float = 0.02       # Wartość - taki sam rozmiar jak tytuł
     
     # ZAKRES WARTOŚCI
     # Domyślnie suwak kontroluje wartości od 0.0 do 1.0 (typowe dla opacity)
     
-    value_minimum = 0.0       # Minimum (często 0 = całkowicie przezroczysty)
-    value_maximum = 1.0       # Maximum (często 1 = całkowicie nieprzezroczysty)
-    value_initial = 1.0       # Początkowa wartość (zaczynamy od maximum)
+    value_minimum: float = 0.0       # Minimum (często 0 = całkowicie przezroczysty)
+    value_maximum: float = 1.0       # Maximum (często 1 = całkowicie nieprzezroczysty)
+    value_initial: float = 1.0       # Początkowa wartość (zaczynamy od maximum)
     
     # POZYCJA W OKNIE
-    # Domyślnie suwak jest w lewym dolnym rogu (p1=[0.02, 0.1], p2=[0.18, 0.1])
+    # Domyślnie suwak jest w lewym dolnym rogu (p1=(0.02, 0.1), p2=(0.18, 0.1))
     # Te wartości są zwykle nadpisywane podczas tworzenia konkretnego suwaka
+    # (krotki - niezmienne, więc mogą być bezpiecznie współdzielone i haszowane)
     
-    p1 = [0.02, 0.1]          # Początek (lewy koniec paska)
-    p2 = [0.18, 0.1]          # Koniec (prawy koniec paska)
+    p1: tuple = (0.02, 0.1)          # Początek (lewy koniec paska)
+    p2: tuple = (0.18, 0.1)          # Koniec (prawy koniec paska)
     
     # DODATKOWE
     
-    title = None              # Tytuł suwaka (np. "liver" lub "Opacity")
+    title: str = None                # Tytuł suwaka (np. "liver" lub "Opacity")
     
     # KOLORY
-    # Używamy nazw z vtkNamedColors - są to standardowe kolory CSS/X11
+    # Nazwy z vtkNamedColors (standardowe kolory CSS/X11), zamienione na RGB
+    # przy imporcie - suwaki z domyślnymi kolorami nie rozwiązują żadnych nazw
     # Lista dostępnych: https://www.vtk.org/doc/nightly/html/classvtkNamedColors.html
     
-    title_color = 'Black'         # Tytuł - czarny, czytelny na jasnym tle
-    label_color = 'Black'         # Wartość - też czarna (obecnie nieużywana?)
-    value_color = 'DarkSlateGray' # Wyświetlana liczba - ciemny szary
-    slider_color = 'BurlyWood'    # Uchwyt - beżowy, neutralny
-    selected_color = 'Lime'       # Uchwyt aktywny - jaskrawa zieleń, dobrze widoczna
-    bar_color = 'Black'           # Pasek - czarny, kontrastuje z tłem
-    bar_ends_color = 'Indigo'     # Czapeczki - ciemny fiolet, ozdobne
+    title_color: tuple = _color3d('Black')           # Tytuł - czarny, czytelny na jasnym tle
+    label_color: tuple = _color3d('Black')           # Wartość - też czarna (obecnie nieużywana?)
+    value_color: tuple = _color3d('DarkSlateGray')   # Wyświetlana liczba - ciemny szary
+    slider_color: tuple = _color3d('BurlyWood')      # Uchwyt - beżowy, neutralny
+    selected_color: tuple = _color3d('Lime')         # Uchwyt aktywny - jaskrawa zieleń, dobrze widoczna
+    bar_color: tuple = _color3d('Black')             # Pasek - czarny, kontrastuje z tłem
+    bar_ends_color: tuple = _color3d('Indigo')       # Czapeczki - ciemny fiolet, ozdobne
+    
+    def at(self, p1, p2, title=None):
+        """
+        Zwraca kopię właściwości z inną pozycją (i opcjonalnie tytułem).
+        
+        Oryginał się nie zmienia, więc jeden obiekt może służyć za wzór
+        dla kilku suwaków.
+        
+        Argumenty:
+            p1 (tuple): (x, y) - początek suwaka
+            p2 (tuple): (x, y) - koniec suwaka
+            title (str lub None): Nowy tytuł (None = tytuł bez zmian)
+        
+        Returns:
+            SliderProperties: Nowy obiekt z podmienioną pozycją
+        """
+        if title is None:
+            title = self.title
+        return replace(self, p1=tuple(p1), p2=tuple(p2), title=title)
 
 
-def make_slider_widget(properties, lut, idx):
+def _build_base_slider(properties, min_val, max_val, initial_val, title):
     """
-    Tworzy widget suwaka z kolorem tytułu pobranym z lookup table.
+    Tworzy widget suwaka ze wspólnymi ustawieniami (wszystko poza kolorem tytułu).
     
-    Ta funkcja jest używana do suwaków kontrolujących przezroczystość tkanek.
-    Tytuł suwaka jest pokolorowany tym samym kolorem co tkanka, dzięki czemu
-    użytkownik od razu wie którego organu dotyczy dany suwak.
+    Wspólna część make_slider_widget(), make_slider_widget_with_color() i
+    make_slice_slider() - fabryki ustawiają już tylko kolor tytułu.
     
     Argumenty:
         properties (SliderProperties): Obiekt z ustawieniami wyglądu
-        lut (vtkLookupTable): Tablica kolorów z której pobieramy kolor tytułu
-        idx (int): Indeks w LUT odpowiadający tej tkance
-            - Jeśli idx jest w zakresie 0-22, używamy koloru z LUT
-            - W przeciwnym razie używamy domyślnego czarnego
+        min_val (int/float): Minimalna wartość suwaka
+        max_val (int/float): Maksymalna wartość suwaka
+        initial_val (int/float): Początkowa pozycja uchwytu
+        title (str): Tytuł suwaka
     
     Returns:
-        vtkSliderWidget: Gotowy widget suwaka, gotowy do podłączenia do interaktora
-    
-    Przykład:
-        >>> props = SliderProperties()
-        >>> props.title = "liver"
-        >>> props.p1 = [0.82, 0.80]
-        >>> props.p2 = [0.97, 0.80]
-        >>> widget = make_slider_widget(props, lut, 5)
-        >>> widget.SetInteractor(interactor)
-        >>> widget.EnabledOn()
+        tuple: (slider, slider_widget)
+            - slider: vtkSliderRepresentation2D (do ustawienia koloru tytułu)
+            - slider_widget: vtkSliderWidget z przypisaną reprezentacją
     """
+    # vtkInteractionWidgets jest importowany dopiero przy pierwszym suwaku -
+    # sam import slider_widgets (np. dla SliderProperties) go nie ładuje.
+    # Kolejne wywołania biorą gotowy moduł z sys.modules.
+    from vtkmodules.vtkInteractionWidgets import vtkSliderRepresentation2D, vtkSliderWidget
     
     # 1: Stwórz reprezentację (wygląd) suwaka
     
@@ -144,13 +242,13 @@ def make_slider_widget(properties, lut, idx):
 
     # 2: Ustaw zakres wartości
     
-    slider.SetMinimumValue(properties.value_minimum)  # Najniższa wartość (lewy koniec)
-    slider.SetMaximumValue(properties.value_maximum)  # Najwyższa wartość (prawy koniec)
-    slider.SetValue(properties.value_initial)         # Początkowa pozycja uchwytu
+    slider.SetMinimumValue(min_val)  # Najniższa wartość (lewy koniec)
+    slider.SetMaximumValue(max_val)  # Najwyższa wartość (prawy koniec)
+    slider.SetValue(initial_val)     # Początkowa pozycja uchwytu
 
     # 3: Ustaw tytuł
     
-    slider.SetTitleText(properties.title)  # Tekst wyświetlany nad suwakiem
+    slider.SetTitleText(title)  # Tekst wyświetlany nad suwakiem
 
     # 4: Ustaw pozycję w oknie
     
@@ -158,12 +256,14 @@ def make_slider_widget(properties, lut, idx):
     # To pozwala suwakom działać poprawnie niezależnie od rozmiaru okna
     
     # Point1 = początek (lewy koniec paska)
-    slider.GetPoint1Coordinate().SetCoordinateSystemToNormalizedDisplay()
-    slider.GetPoint1Coordinate().SetValue(properties.p1[0], properties.p1[1])
+    point1 = slider.GetPoint1Coordinate()
+    point1.SetCoordinateSystemToNormalizedDisplay()
+    point1.SetValue(*properties.p1)
     
     # Point2 = koniec (prawy koniec paska)
-    slider.GetPoint2Coordinate().SetCoordinateSystemToNormalizedDisplay()
-    slider.GetPoint2Coordinate().SetValue(properties.p2[0], properties.p2[1])
+    point2 = slider.GetPoint2Coordinate()
+    point2.SetCoordinateSystemToNormalizedDisplay()
+    point2.SetValue(*properties.p2)
 
     # 5: Ustaw rozmiary elementów
     
@@ -177,35 +277,73 @@ def make_slider_widget(properties, lut, idx):
 
     # 6: Ustaw kolory
     
-    # vtkNamedColors pozwala używać nazw kolorów zamiast wartości RGB
-    colors = vtkNamedColors()
+    # Domyślne kolory są już krotkami RGB; nazwy ustawione na instancji
+    # zamienia _rgb() (przez zapamiętujący _color3d())
     
     # Kolory poszczególnych elementów suwaka
-    slider.GetTubeProperty().SetColor(colors.GetColor3d(properties.bar_color))
-    slider.GetCapProperty().SetColor(colors.GetColor3d(properties.bar_ends_color))
-    slider.GetSliderProperty().SetColor(colors.GetColor3d(properties.slider_color))
-    slider.GetSelectedProperty().SetColor(colors.GetColor3d(properties.selected_color))
-    slider.GetLabelProperty().SetColor(colors.GetColor3d(properties.value_color))
+    slider.GetTubeProperty().SetColor(_rgb(properties.bar_color))
+    slider.GetCapProperty().SetColor(_rgb(properties.bar_ends_color))
+    slider.GetSliderProperty().SetColor(_rgb(properties.slider_color))
+    slider.GetSelectedProperty().SetColor(_rgb(properties.selected_color))
+    slider.GetLabelProperty().SetColor(_rgb(properties.value_color))
+
+    # 7: Stwórz widget i przypisz reprezentację
+    
+    # vtkSliderWidget to wrapper który łączy reprezentację (wygląd) z interakcją
+    slider_widget = vtkSliderWidget()
+    slider_widget.SetRepresentation(slider)
+    
+    return slider, slider_widget
+
+
+def make_slider_widget(properties, lut, idx):
+    """
+    Tworzy widget suwaka z kolorem tytułu pobranym z lookup table.
+    
+    Ta funkcja jest używana do suwaków kontrolujących przezroczystość tkanek.
+    Tytuł suwaka jest pokolorowany tym samym kolorem co tkanka, dzięki czemu
+    użytkownik od razu wie którego organu dotyczy dany suwak.
+    
+    Argumenty:
+        properties (SliderProperties): Obiekt z ustawieniami wyglądu
+        lut (vtkLookupTable): Tablica kolorów z której pobieramy kolor tytułu
+        idx (int): Indeks w LUT odpowiadający tej tkance
+            - Jeśli idx jest w zakresie 0-22, używamy koloru z LUT
+            - W przeciwnym razie używamy domyślnego czarnego
+    
+    Returns:
+        vtkSliderWidget: Gotowy widget suwaka, gotowy do podłączenia do interaktora
+    
+    Przykład:
+        >>> props = SliderProperties()
+        >>> props.title = "liver"
+        >>> props.p1 = (0.82, 0.80)
+        >>> props.p2 = (0.97, 0.80)
+        >>> widget = make_slider_widget(props, lut, 5)
+        >>> widget.SetInteractor(interactor)
+        >>> widget.EnabledOn()
+    """
+
+    # 1: Wspólne ustawienia (zakres i tytuł z properties)
+    
+    slider, slider_widget = _build_base_slider(
+        properties, properties.value_minimum, properties.value_maximum,
+        properties.value_initial, properties.title)
 
-    # 7: Ustaw kolor tytułu (specjalny przypadek)
+    # 2: Ustaw kolor tytułu (specjalny przypadek)
     
     # Jeśli indeks jest w poprawnym zakresie (0-22), używamy koloru z LUT
     # To sprawia że tytuł ma kolor odpowiadający tkance
-    if 0 <= idx < 23:
-        # GetTableValue zwraca (R, G, B, Alpha), bierzemy tylko RGB ([:3])
-        slider.GetTitleProperty().SetColor(lut.GetTableValue(idx)[:3])
+    title_color = _title_color_for(lut, idx)
+    if title_color is not None:
+        # Kolor RGB z tablicy odczytanej z LUT raz dla wszystkich suwaków
+        slider.GetTitleProperty().SetColor(title_color)
         # Wyłączamy cień pod tekstem (ładniej wygląda kolorowy tekst bez cienia)
         slider.GetTitleProperty().ShadowOff()
     else:
         # Dla indeksów poza zakresem używamy domyślnego koloru
-        slider.GetTitleProperty().SetColor(colors.GetColor3d(properties.title_color))
+        slider.GetTitleProperty().SetColor(_rgb(properties.title_color))
 
-    # 8: Stwórz widget i przypisz reprezentację
-    
-    # vtkSliderWidget to wrapper który łączy reprezentację (wygląd) z interakcją
-    slider_widget = vtkSliderWidget()
-    slider_widget.SetRepresentation(slider)
-    
     # Zwracamy gotowy widget (jeszcze nie podłączony do interaktora)
     return slider_widget
 
@@ -230,51 +368,25 @@ def make_slider_widget_with_color(properties, rgb_color):
     Przykład:
         >>> props = SliderProperties()
         >>> props.title = "Seg 15"
-        >>> props.p1 = [0.82, 0.75]
-        >>> props.p2 = [0.97, 0.75]
+        >>> props.p1 = (0.82, 0.75)
+        >>> props.p2 = (0.97, 0.75)
         >>> color = (0.8, 0.3, 0.2)  # Pomarańczowo-czerwony
         >>> widget = make_slider_widget_with_color(props, color)
     """
-    
-    # KROKI 1-6: Identyczne jak w make_slider_widget()
-    
-    slider = vtkSliderRepresentation2D()
-    slider.SetMinimumValue(properties.value_minimum)
-    slider.SetMaximumValue(properties.value_maximum)
-    slider.SetValue(properties.value_initial)
-    slider.SetTitleText(properties.title)
-
-    slider.GetPoint1Coordinate().SetCoordinateSystemToNormalizedDisplay()
-    slider.GetPoint1Coordinate().SetValue(properties.p1[0], properties.p1[1])
-    slider.GetPoint2Coordinate().SetCoordinateSystemToNormalizedDisplay()
-    slider.GetPoint2Coordinate().SetValue(properties.p2[0], properties.p2[1])
 
-    slider.SetTubeWidth(properties.tube_width)
-    slider.SetSliderLength(properties.slider_length)
-    slider.SetSliderWidth(properties.slider_width)
-    slider.SetEndCapLength(properties.end_cap_length)
-    slider.SetEndCapWidth(properties.end_cap_width)
-    slider.SetTitleHeight(properties.title_height)
-    slider.SetLabelHeight(properties.label_height)
-
-    colors = vtkNamedColors()
-    slider.GetTubeProperty().SetColor(colors.GetColor3d(properties.bar_color))
-    slider.GetCapProperty().SetColor(colors.GetColor3d(properties.bar_ends_color))
-    slider.GetSliderProperty().SetColor(colors.GetColor3d(properties.slider_color))
-    slider.GetSelectedProperty().SetColor(colors.GetColor3d(properties.selected_color))
-    slider.GetLabelProperty().SetColor(colors.GetColor3d(properties.value_color))
+    # 1: Wspólne ustawienia - identyczne jak w make_slider_widget()
     
-    # 7: Ustaw własny kolor tytułu (różnica względem make_slider_widget)
+    slider, slider_widget = _build_base_slider(
+        properties, properties.value_minimum, properties.value_maximum,
+        properties.value_initial, properties.title)
+    
+    # 2: Ustaw własny kolor tytułu (różnica względem make_slider_widget)
     
     # Bezpośrednio ustawiamy przekazany kolor RGB
     slider.GetTitleProperty().SetColor(rgb_color)
     # Wyłączamy cień (kolorowy tekst ładniej wygląda bez cienia)
     slider.GetTitleProperty().ShadowOff()
 
-    # 8: Stwórz i zwróć widget
-    
-    slider_widget = vtkSliderWidget()
-    slider_widget.SetRepresentation(slider)
     return slider_widget
 
 
@@ -303,53 +415,18 @@ def make_slice_slider(properties, min_val, max_val, initial_val, title):
     
     Przykład:
         >>> props = SliderProperties()
-        >>> props.p1 = [0.25, 0.05]  # Dolny środek ekranu
-        >>> props.p2 = [0.40, 0.05]
+        >>> props.p1 = (0.25, 0.05)  # Dolny środek ekranu
+        >>> props.p2 = (0.40, 0.05)
         >>> # Suwak od -50 do 50, zaczynając od 0
         >>> widget = make_slice_slider(props, -50, 50, 0, "Z Slice")
     """
+
+    # 1: Wspólne ustawienia - tutaj z przekazanym zakresem zamiast z properties
     
-    # 1-4: Stwórz reprezentację i ustaw podstawowe parametry
-    
-    slider = vtkSliderRepresentation2D()
-    
-    # Tutaj używamy przekazanych wartości zamiast z properties
-    slider.SetMinimumValue(min_val)
-    slider.SetMaximumValue(max_val)
-    slider.SetValue(initial_val)
-    slider.SetTitleText(title)
-    
-    # Pozycja w oknie
-    slider.GetPoint1Coordinate().SetCoordinateSystemToNormalizedDisplay()
-    slider.GetPoint1Coordinate().SetValue(properties.p1[0], properties.p1[1])
-    slider.GetPoint2Coordinate().SetCoordinateSystemToNormalizedDisplay()
-    slider.GetPoint2Coordinate().SetValue(properties.p2[0], properties.p2[1])
-    
-    # 5: Rozmiary
-    
-    slider.SetTubeWidth(properties.tube_width)
-    slider.SetSliderLength(properties.slider_length)
-    slider.SetSliderWidth(properties.slider_width)
-    slider.SetEndCapLength(properties.end_cap_length)
-    slider.SetEndCapWidth(properties.end_cap_width)
-    slider.SetTitleHeight(properties.title_height)
-    slider.SetLabelHeight(properties.label_height)
-    
-    # 6: Kolory
-    
-    colors = vtkNamedColors()
-    slider.GetTubeProperty().SetColor(colors.GetColor3d(properties.bar_color))
-    slider.GetCapProperty().SetColor(colors.GetColor3d(properties.bar_ends_color))
-    slider.GetSliderProperty().SetColor(colors.GetColor3d(properties.slider_color))
-    slider.GetSelectedProperty().SetColor(colors.GetColor3d(properties.selected_color))
-    slider.GetLabelProperty().SetColor(colors.GetColor3d(properties.value_color))
+    slider, slider_widget = _build_base_slider(properties, min_val, max_val, initial_val, title)
     
-    # Tytuł zawsze czarny (nie kolorowany jak w innych suwaków)
-    slider.GetTitleProperty().SetColor(colors.GetColor3d(properties.title_color))
+    # 2: Tytuł zawsze czarny (nie kolorowany jak w innych suwaków)
     
-    # 7: Stwórz i zwróć widget
+    slider.GetTitleProperty().SetColor(_rgb(properties.title_color))
     
-    slider_widget = vtkSliderWidget()
-    slider_widget.SetRepresentation(slider)
     return slider_widget
-
@@ -50,31 +50,37 @@ class SliceOrder:
     Przykład: 'hfsi' = head-first + superior-inferior
     
     Atrybuty:
-        si_mat, is_mat, lr_mat, rl_mat, hf_mat: Macierze transformacji 4x4
+        si_mat, is_mat, lr_mat, rl_mat, hf_mat: Macierze transformacji 4x4 (atrybuty klasy)
         transform (dict): Słownik {nazwa: vtkTransform} ze wszystkimi transformacjami
+            (wspólny dla instancji, zbudowany raz w _build_transforms())
     """
     
-    def __init__(self):
+    @classmethod
+    def _build_transforms(cls):
         """
-        Inicjalizuje wszystkie transformacje.
+        Buduje wszystkie transformacje - raz, przy imporcie modułu.
         
         Tworzy macierze 4x4 dla różnych orientacji i konwertuje je na obiekty
-        vtkTransform. Macierze są tworzone ręcznie (element po elemencie) zamiast
-        przez mnożenie, co jest szybsze i bardziej czytelne.
+        vtkTransform. Macierze są wpisywane ręcznie zamiast liczone przez
+        mnożenie, co jest szybsze i bardziej czytelne - każda jednym DeepCopy()
+        z 16 wartości (wiersz po wierszu) zamiast Zero() i kilku SetElement().
+        
+        Macierze są stałe, więc trzymamy je (i słownik _TRANSFORMS) na klasie -
+        kolejne instancje SliceOrder niczego nie przeliczają.
         """
         
         # MACIERZ SI (SUPERIOR-INFERIOR)
         # Transformacja dla danych gdzie oś Z idzie od góry do dołu ciała
         
-        self.si_mat = vtkMatrix4x4()
-        self.si_mat.Zero()  # Wypełnij zerami
+        cls.si_mat = vtkMatrix4x4()
         
-        # Ustaw macierz element po elemencie
-        # Macierz 4x4 ma indeksy (row, col) od 0 do 3
-        self.si_mat.SetElement(0, 0, 1)   # X' = X (bez zmian)
-        self.si_mat.SetElement(1, 2, 1)   # Y' = Z (Y staje się Z)
-        self.si_mat.SetElement(2, 1, -1)  # Z' = -Y (Z staje się -Y, odbicie!)
-        self.si_mat.SetElement(3, 3, 1)   # W' = W (współrzędna jednorodna)
+        # Ustaw całą macierz naraz - 16 wartości wiersz po wierszu
+        cls.si_mat.DeepCopy((
+            1, 0, 0, 0,    # X' = X (bez zmian)
+            0, 0, 1, 0,    # Y' = Z (Y staje się Z)
+            0, -1, 0, 0,   # Z' = -Y (Z staje się -Y, odbicie!)
+            0, 0, 0, 1,    # W' = W (współrzędna jednorodna)
+        ))
         
         # Matematycznie to jest:
         # [X']   [1  0  0  0] [X]
@@ -85,162 +91,216 @@ class SliceOrder:
         # MACIERZ IS (INFERIOR-SUPERIOR)
         # Odwrotność SI - oś Z idzie od dołu do góry ciała
         
-        self.is_mat = vtkMatrix4x4()
-        self.is_mat.Zero()
-        self.is_mat.SetElement(0, 0, 1)   # X' = X
-        self.is_mat.SetElement(1, 2, -1)  # Y' = -Z (inne odbicie niż SI)
-        self.is_mat.SetElement(2, 1, -1)  # Z' = -Y
-        self.is_mat.SetElement(3, 3, 1)   # W' = W
+        cls.is_mat = vtkMatrix4x4()
+        cls.is_mat.DeepCopy((
+            1, 0, 0, 0,    # X' = X
+            0, 0, -1, 0,   # Y' = -Z (inne odbicie niż SI)
+            0, -1, 0, 0,   # Z' = -Y
+            0, 0, 0, 1,    # W' = W
+        ))
 
         # MACIERZ LR (LEFT-RIGHT)
         # Transformacja dla danych gdzie oś X idzie od lewej do prawej
         
-        self.lr_mat = vtkMatrix4x4()
-        self.lr_mat.Zero()
-        self.lr_mat.SetElement(0, 2, -1)  # X' = -Z (zamiana osi z odbiciem)
-        self.lr_mat.SetElement(1, 1, -1)  # Y' = -Y (odbicie Y)
-        self.lr_mat.SetElement(2, 0, 1)   # Z' = X (zamiana)
-        self.lr_mat.SetElement(3, 3, 1)   # W' = W
+        cls.lr_mat = vtkMatrix4x4()
+        cls.lr_mat.DeepCopy((
+            0, 0, -1, 0,   # X' = -Z (zamiana osi z odbiciem)
+            0, -1, 0, 0,   # Y' = -Y (odbicie Y)
+            1, 0, 0, 0,    # Z' = X (zamiana)
+            0, 0, 0, 1,    # W' = W
+        ))
 
         # MACIERZ RL (RIGHT-LEFT)
         # Odwrotność LR - oś X idzie od prawej do lewej
         
-        self.rl_mat = vtkMatrix4x4()
-        self.rl_mat.Zero()
-        self.rl_mat.SetElement(0, 2, 1)   # X' = Z (bez odbicia tym razem)
-        self.rl_mat.SetElement(1, 1, -1)  # Y' = -Y (odbicie Y)
-        self.rl_mat.SetElement(2, 0, 1)   # Z' = X
-        self.rl_mat.SetElement(3, 3, 1)   # W' = W
+        cls.rl_mat = vtkMatrix4x4()
+        cls.rl_mat.DeepCopy((
+            0, 0, 1, 0,    # X' = Z (bez odbicia tym razem)
+            0, -1, 0, 0,   # Y' = -Y (odbicie Y)
+            1, 0, 0, 0,    # Z' = X
+            0, 0, 0, 1,    # W' = W
+        ))
 
         # MACIERZ HF (HEAD FIRST)
         # Transformacja dla orientacji "head first" (głowa pierwsza do skanera)
         # To jest bazowa transformacja którą potem łączymy z innymi
         
-        self.hf_mat = vtkMatrix4x4()
-        self.hf_mat.Zero()
-        self.hf_mat.SetElement(0, 0, -1)  # X' = -X (odbicie X)
-        self.hf_mat.SetElement(1, 1, 1)   # Y' = Y (bez zmian)
-        self.hf_mat.SetElement(2, 2, -1)  # Z' = -Z (odbicie Z)
-        self.hf_mat.SetElement(3, 3, 1)   # W' = W
+        cls.hf_mat = vtkMatrix4x4()
+        cls.hf_mat.DeepCopy((
+            -1, 0, 0, 0,   # X' = -X (odbicie X)
+            0, 1, 0, 0,    # Y' = Y (bez zmian)
+            0, 0, -1, 0,   # Z' = -Z (odbicie Z)
+            0, 0, 0, 1,    # W' = W
+        ))
 
         # SŁOWNIK TRANSFORMACJI
         # Tutaj przechowujemy wszystkie transformacje jako obiekty vtkTransform
         
-        self.transform = {}
+        transforms = {}
 
         # Proste transformacje (jedna macierz) 
         
         # SI - Superior-Inferior
         si_trans = vtkTransform()
-        si_trans.SetMatrix(self.si_mat)
-        self.transform['si'] = si_trans
+        si_trans.SetMatrix(cls.si_mat)
+        transforms['si'] = si_trans
 
         # IS - Inferior-Superior
         is_trans = vtkTransform()
-        is_trans.SetMatrix(self.is_mat)
-        self.transform['is'] = is_trans
+        is_trans.SetMatrix(cls.is_mat)
+        transforms['is'] = is_trans
 
         # AP - Anterior-Posterior (używa Scale zamiast macierzy)
         # Scale(1, -1, 1) = odbij tylko Y
         ap_trans = vtkTransform()
         ap_trans.Scale(1, -1, 1)
-        self.transform['ap'] = ap_trans
+        transforms['ap'] = ap_trans
 
         # PA - Posterior-Anterior
         # Scale(1, -1, -1) = odbij Y i Z
         pa_trans = vtkTransform()
         pa_trans.Scale(1, -1, -1)
-        self.transform['pa'] = pa_trans
+        transforms['pa'] = pa_trans
 
         # LR - Left-Right
         lr_trans = vtkTransform()
-        lr_trans.SetMatrix(self.lr_mat)
-        self.transform['lr'] = lr_trans
+        lr_trans.SetMatrix(cls.lr_mat)
+        transforms['lr'] = lr_trans
 
         # RL - Right-Left
         rl_trans = vtkTransform()
-        rl_trans.SetMatrix(self.rl_mat)
-        self.transform['rl'] = rl_trans
+        rl_trans.SetMatrix(cls.rl_mat)
+        transforms['rl'] = rl_trans
 
         # HF - Head First (bazowa)
         hf_trans = vtkTransform()
-        hf_trans.SetMatrix(self.hf_mat)
-        self.transform['hf'] = hf_trans
+        hf_trans.SetMatrix(cls.hf_mat)
+        transforms['hf'] = hf_trans
 
         #Złożone transformacje (kombinacje macierzy)
-        # Używamy Concatenate() żeby połączyć dwie transformacje
-        # Kolejność jest WAŻNA: Concatenate(B) oznacza "najpierw obecna, potem B"
+        # Iloczyny HF · X są wpisane wprost zamiast SetMatrix(HF) + Concatenate(X)
+        # - bez mnożenia macierzy przy budowie. HF = diag(-1, 1, -1, 1), więc
+        # HF · X to macierz X z przeciwnym znakiem w pierwszym i trzecim wierszu.
+        # (Concatenate(B) oznaczałoby "najpierw obecna, potem B": wynik HF · B)
         
-        # HFSI - Head First + Superior-Inferior
+        # HFSI - Head First + Superior-Inferior (HF · SI)
         hf_si_trans = vtkTransform()
-        hf_si_trans.SetMatrix(self.hf_mat)      # Najpierw HF
-        hf_si_trans.Concatenate(self.si_mat)    # Potem SI
-        self.transform['hfsi'] = hf_si_trans
+        hf_si_trans.SetMatrix((
+            -1, 0, 0, 0,
+            0, 0, 1, 0,
+            0, 1, 0, 0,
+            0, 0, 0, 1,
+        ))
+        transforms['hfsi'] = hf_si_trans
 
-        # HFIS - Head First + Inferior-Superior
+        # HFIS - Head First + Inferior-Superior (HF · IS)
         hf_is_trans = vtkTransform()
-        hf_is_trans.SetMatrix(self.hf_mat)
-        hf_is_trans.Concatenate(self.is_mat)
-        self.transform['hfis'] = hf_is_trans
+        hf_is_trans.SetMatrix((
+            -1, 0, 0, 0,
+            0, 0, -1, 0,
+            0, 1, 0, 0,
+            0, 0, 0, 1,
+        ))
+        transforms['hfis'] = hf_is_trans
 
-        # HFAP - Head First + Anterior-Posterior
+        # HFAP - Head First + Anterior-Posterior (HF · Scale(1, -1, 1))
         hf_ap_trans = vtkTransform()
-        hf_ap_trans.SetMatrix(self.hf_mat)
-        hf_ap_trans.Scale(1, -1, 1)  # Concatenate Scale jako operację
-        self.transform['hfap'] = hf_ap_trans
+        hf_ap_trans.SetMatrix((
+            -1, 0, 0, 0,
+            0, -1, 0, 0,
+            0, 0, -1, 0,
+            0, 0, 0, 1,
+        ))
+        transforms['hfap'] = hf_ap_trans
 
-        # HFPA - Head First + Posterior-Anterior
+        # HFPA - Head First + Posterior-Anterior (HF · Scale(1, -1, -1))
         hf_pa_trans = vtkTransform()
-        hf_pa_trans.SetMatrix(self.hf_mat)
-        hf_pa_trans.Scale(1, -1, -1)
-        self.transform['hfpa'] = hf_pa_trans
+        hf_pa_trans.SetMatrix((
+            -1, 0, 0, 0,
+            0, -1, 0, 0,
+            0, 0, 1, 0,
+            0, 0, 0, 1,
+        ))
+        transforms['hfpa'] = hf_pa_trans
 
-        # HFLR - Head First + Left-Right
+        # HFLR - Head First + Left-Right (HF · LR)
         hf_lr_trans = vtkTransform()
-        hf_lr_trans.SetMatrix(self.hf_mat)
-        hf_lr_trans.Concatenate(self.lr_mat)
-        self.transform['hflr'] = hf_lr_trans
+        hf_lr_trans.SetMatrix((
+            0, 0, 1, 0,
+            0, -1, 0, 0,
+            -1, 0, 0, 0,
+            0, 0, 0, 1,
+        ))
+        transforms['hflr'] = hf_lr_trans
 
-        # HFRL - Head First + Right-Left
+        # HFRL - Head First + Right-Left (HF · RL)
         hf_rl_trans = vtkTransform()
-        hf_rl_trans.SetMatrix(self.hf_mat)
-        hf_rl_trans.Concatenate(self.rl_mat)
-        self.transform['hfrl'] = hf_rl_trans
+        hf_rl_trans.SetMatrix((
+            0, 0, -1, 0,
+            0, -1, 0, 0,
+            -1, 0, 0, 0,
+            0, 0, 0, 1,
+        ))
+        transforms['hfrl'] = hf_rl_trans
 
         # Specjalne transformacje 
         
         # I - Identity (transformacja tożsamościowa, nic nie zmienia)
         # Używana gdy dane są już w poprawnej orientacji
-        self.transform['I'] = vtkTransform()
+        transforms['I'] = vtkTransform()
 
         # Z - Zero (skaluje wszystko do 0, efektywnie "ukrywa" obiekt)
         # używane do debugowania 
         z_trans = vtkTransform()
         z_trans.Scale(0, 0, 0)
-        self.transform['Z'] = z_trans
+        transforms['Z'] = z_trans
+
+        cls._TRANSFORMS = transforms
+
+    def __init__(self):
+        """
+        Inicjalizuje obiekt - transformacje są już zbudowane na poziomie klasy.
+        
+        Słownik self.transform jest wspólny dla wszystkich instancji (tak jak
+        obiekty zwracane przez get() - przed modyfikacją trzeba je skopiować).
+        """
+        self.transform = SliceOrder._TRANSFORMS
 
-    def get(self, order):
+    @classmethod
+    def get(cls, order):
         """
         Pobiera transformację dla danej orientacji.
         
+        Działa zarówno na instancji (SLICE_ORDER.get('hfsi')), jak i na klasie
+        (SliceOrder.get('hfsi')) - transformacje są wspólne, nie trzeba
+        tworzyć nowego obiektu.
+        
         Argumenty:
             order (str): Nazwa orientacji (np. 'si', 'hfap', 'lr')
-                Zobacz self.transform.keys() dla pełnej listy
+                Zobacz SliceOrder._TRANSFORMS.keys() dla pełnej listy
         
         Returns:
-            vtkTransform: Obiekt transformacji gotowy do użycia
+            vtkTransform: Obiekt transformacji gotowy do użycia. To jest obiekt
+                przechowywany w _TRANSFORMS (nie kopia) - przed modyfikacją
+                (np. Scale()) skopiuj go przez vtkTransform.DeepCopy()
         
         Raises:
-            Exception: Jeśli podana orientacja nie istnieje
+            KeyError: Jeśli podana orientacja nie istnieje
         
         Przykład:
-            >>> slice_order = SliceOrder()
-            >>> transform = slice_order.get('hfsi')
+            >>> transform = SLICE_ORDER.get('hfsi')
             >>> filter.SetTransform(transform)
         """
-        if order in self.transform:
-            return self.transform[order]
-        
-        # Jeśli orientacja nie istnieje, rzuć wyjątek
-        raise Exception(f'No such transform "{order}" exists.')
+        # Jedno wyszukiwanie w słowniku (zamiast "in" i potem [])
+        transform = cls._TRANSFORMS.get(order)
+        if transform is None:
+            # Jeśli orientacja nie istnieje, rzuć wyjątek
+            # (komunikat jest formatowany tylko w przypadku błędu)
+            raise KeyError(f'No such transform "{order}" exists.')
+        return transform
+
+
+SliceOrder._build_transforms()
 
+# Wspólna instancja - w aplikacji nie ma powodu tworzyć kolejnych
+SLICE_ORDER = SliceOrder()